@@ -0,0 +1,165 @@
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import calendar_data
+import render
+from generate_plot_batch import cities_coordinates, city_names
+
+# Offline timings of each pipeline stage, on the results/*_data.json fixtures:
+#
+#   python benchmarks.py                               # print timings
+#   python benchmarks.py --save bench_baseline.json    # store them as a baseline
+#   python benchmarks.py --compare bench_baseline.json --threshold 0.2
+#
+# Every benchmark is called once to warm up, then timed --repeat times; the
+# minimum is compared against the baseline (the least noisy of the rounds) and
+# --compare exits 1 when any benchmark got slower than baseline * (1 + threshold).
+# Baselines are per machine, record one before a change and compare after it.
+
+YEAR = 2025
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def load_fixtures(pattern):
+    # city name -> CalendarData of every results/<city>_data.json
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, pattern))):
+        fixtures[os.path.basename(path)[:-len("_data.json")]] = calendar_data.load_json(path)
+    return fixtures
+
+
+def gappy_columns(fixtures):
+    # every fixture's columns with a polar-summer-like run of missing days and
+    # scattered single ones, for the gap filler to fill back
+    columns = []
+    for data in fixtures.values():
+        columns.append(calendar_data.flat_columns(calendar_data.to_arrays(data))[1])
+    columns = np.concatenate(columns)
+    columns[:, 150:200] = np.nan
+    columns[:, ::17] = np.nan
+    return columns
+
+
+def benchmarks(fixtures, tmpdir):
+    # (name, callable) in pipeline order
+    coordinates = dict(zip(city_names, cities_coordinates))
+    cases = []
+    for city in fixtures:
+        if city in coordinates:
+            lat, lon = coordinates[city]
+            cases.append((f"compute/{city}",
+                          lambda lat=lat, lon=lon: calendar_data.compute_calendar_data(lat, lon, "Asia/Kolkata", YEAR)))
+
+    columns = gappy_columns(fixtures)
+    cases.append(("fill_gaps", lambda: calendar_data.fill_gaps(columns)))
+
+    json_paths = [os.path.join(FIXTURES, f"{city}_data.json") for city in fixtures]
+    npz_paths = []
+    for city, data in fixtures.items():
+        npz_paths.append(os.path.join(tmpdir, f"{city}_data.npz"))
+        calendar_data.save_npz(npz_paths[-1], data)
+    cases.append(("load/json", lambda: [calendar_data.load_json(path) for path in json_paths]))
+    cases.append(("load/npz", lambda: [calendar_data.load_npz(path) for path in npz_paths]))
+
+    city, data = next(iter(fixtures.items()))
+    coordinates_str = render.format_coordinates(*coordinates.get(city, (0, 0)))
+    template = render.calendar_template(YEAR)
+
+    def build_template():
+        render.CalendarTemplate(YEAR).close()
+
+    def draw():
+        template.render(data, city, coordinates_str, "Asia/Kolkata").canvas.draw()
+
+    def export(fmt):
+        fig = template.render(data, city, coordinates_str, "Asia/Kolkata")
+        return lambda: render.export_figure(fig, {fmt: io.BytesIO()})
+
+    cases += [
+        ("figure/template", build_template),
+        ("figure/render", lambda: template.render(data, city, coordinates_str, "Asia/Kolkata")),
+        ("figure/draw", draw),
+        ("export/png", export("png")),
+        ("export/pdf", export("pdf")),
+    ]
+    return cases
+
+
+def measure(function, repeat):
+    function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times)}
+
+
+def compare(results, baseline, threshold):
+    # prints current vs baseline minimums and returns the regressed names
+    regressed = []
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        ratio = timing["min"] / baseline[name]["min"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"{name:<24} {baseline[name]['min'] * 1000:10.2f} ms -> {timing['min'] * 1000:10.2f} ms"
+              f"  x{ratio:.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each pipeline stage on the results/ fixtures")
+    parser.add_argument("-k", "--filter", default="",
+                        help="only run benchmarks whose name contains this")
+    parser.add_argument("--fixtures", default="*_data.json",
+                        help="glob of fixture files in results/ (default: *_data.json)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per benchmark (default: 5)")
+    parser.add_argument("--save", help="write the timings to this baseline JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown over the baseline, 0.2 is 20%% (default: 0.2)")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        sys.exit(f"no fixtures match {os.path.join(FIXTURES, args.fixtures)}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, function in benchmarks(fixtures, tmpdir):
+            if args.filter in name:
+                results[name] = measure(function, args.repeat)
+                print(f"{name:<24} min {results[name]['min'] * 1000:10.2f} ms"
+                      f"   median {results[name]['median'] * 1000:10.2f} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "repeat": args.repeat, "results": results}, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        print()
+        regressed = compare(results, baseline, args.threshold)
+        if regressed:
+            print(f"{len(regressed)} benchmarks regressed more than {args.threshold:.0%}: {', '.join(regressed)}",
+                  file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
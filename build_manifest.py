@@ -0,0 +1,109 @@
+import ast
+import functools
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import calendar_data
+import render
+
+# Record of what every batch output was built from, so a rerun only redoes the
+# stale stages. Each output path maps to the digest of its inputs plus the size
+# and mtime it was written with; it is fresh while both still match. Day data
+# files depend on the location, year and ephemeris engine; images depend on the
+# data arrays, the title, the export options and the renderer's source code and
+# fonts, so editing the style re-renders every city without recomputing any
+# ephemeris.
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def digest(inputs):
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def data_digest(data):
+    # at the precision the data files store, so freshly computed data and the
+    # same data loaded back from .json or .npz give the same digest
+    arrays = calendar_data.to_arrays(data)
+    names, columns = calendar_data.flat_columns(arrays)
+    sha = hashlib.sha256(json.dumps(names).encode())
+    sha.update(np.round(np.array(columns) * calendar_data.SCALE).astype(np.int64).tobytes())
+    sha.update(arrays["days_in_month"].astype(np.int64).tobytes())
+    if "polar" in arrays:
+        sha.update(arrays["polar"].tobytes())
+    if "year" in arrays:
+        sha.update(str(int(arrays["year"])).encode())
+    return sha.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def module_sources(module):
+    # paths of module and every repo module it imports, directly or through
+    # another one, so an edit anywhere the renderer reaches marks images stale
+    sources = {}
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        path = os.path.join(DIRECTORY, f"{name}.py")
+        if name in sources or not os.path.exists(path):
+            continue
+        sources[name] = path
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending += [alias.name.partition(".")[0] for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module.partition(".")[0])
+    return tuple(sources[name] for name in sorted(sources))
+
+
+def renderer_digest():
+    sha = hashlib.sha256()
+    for path in module_sources("render") + render.FONT_FILES:
+        sha.update(os.path.basename(path).encode())
+        try:
+            with open(path, "rb") as f:
+                sha.update(f.read())
+        except FileNotFoundError:
+            # a missing font fails the render itself
+            pass
+    return sha.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.built = {}  # entries recorded since loading
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+
+    def fresh(self, output, inputs):
+        entry = self.entries.get(output)
+        if entry is None or entry["inputs"] != digest(inputs):
+            return False
+        try:
+            stat = os.stat(output)
+        except FileNotFoundError:
+            return False
+        return stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+    def record(self, output, inputs):
+        stat = os.stat(output)
+        self.built[output] = {"inputs": digest(inputs), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def update(self, built):
+        self.entries.update(built)
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import traceback
+
+# One entry point for single-city jobs:
+#
+#   python calendar_cli.py generate 17.7219 83.3057 -o vizag_data.json
+#   python calendar_cli.py render vizag_data.json --name Vizag --coordinates "17.7219°N, 83.3057°E"
+#   python calendar_cli.py plot 17.7219 83.3057 --name Vizag
+#
+# Only argparse and the stdlib load up front; numpy and matplotlib are
+# imported by the job that needs them. `--daemon` imports and warms everything
+# once (fonts, the year's template) and runs jobs sent over a Unix socket, and
+# any command given `--socket` is handed to that daemon instead of run here,
+# falling back to running locally when no daemon is listening.
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "polar-calendar.sock")
+
+
+def run_job(job):
+    # job is the plain dict the client sends; returns the paths written
+    import calendar_data
+
+    written = []
+    if job["command"] == "render":
+        data = calendar_data.load_data(job["data"])
+    else:
+        data = calendar_data.compute_calendar_data(job["lat"], job["lon"], job["tz"], job["year"])
+        if job["data_output"]:
+            calendar_data.save_data(job["data_output"], data)
+            written.append(job["data_output"])
+
+    if job["command"] != "generate":
+        import render
+
+        coordinates = job["coordinates"] or render.format_coordinates(job["lat"], job["lon"])
+        # a data file's own year wins over --year, which only old files lack
+        year = job["year"] if data.year is None else data.year
+        fig = render.calendar_template(year).render(data, job["name"], coordinates, job["tz"])
+        render.save_figure(fig, job["output"], job["formats"], png_dpi=job["png_dpi"], strip_height=job["strip_height"])
+        written += [f"{job['output']}.{fmt}" for fmt in job["formats"]]
+        if job["preview"]:
+            render.save_figure(fig, f"{job['output']}_preview", ["png"], png_size=job["preview"])
+            written.append(f"{job['output']}_preview.png")
+    return written
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    # one JSON job per connection, answered with one JSON line
+    def handle(self):
+        try:
+            job = json.loads(self.rfile.readline())
+            reply = {"ok": True, "written": [] if job["command"] == "ping" else run_job(job)}
+        except Exception:
+            reply = {"ok": False, "error": traceback.format_exc()}
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+def send_job(path, job):
+    # the daemon's reply, or None when nothing is listening on path
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+            client.sendall(json.dumps(job).encode() + b"\n")
+            return json.loads(client.makefile("rb").readline())
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+
+
+def run_daemon(path, year):
+    import calendar_data
+    import render
+
+    calendar_data.compute_calendar_data(0, 0, "UTC", year)
+    render.warm_up(year)
+    if os.path.exists(path):
+        if send_job(path, {"command": "ping"}) is not None:
+            sys.exit(f"a daemon is already listening on {path}")
+        os.remove(path)
+
+    # jobs run one at a time: they share the cached figure templates
+    with socketserver.UnixStreamServer(path, JobHandler) as server:
+        print(f"calendar daemon listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate day data and render polar calendars")
+    parser.add_argument("--daemon", action="store_true",
+                        help="stay running with everything imported and serve jobs on --socket")
+    parser.add_argument("--socket", nargs="?", const=DEFAULT_SOCKET,
+                        help=f"Unix socket of the daemon (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--year", type=int, default=2025, help="calendar year (default: 2025; render takes it from the data file when recorded)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    generate = subparsers.add_parser("generate", help="compute and save day data")
+    render_cmd = subparsers.add_parser("render", help="render a calendar from a day data file")
+    plot = subparsers.add_parser("plot", help="compute day data and render it in one go")
+    for sub in (generate, plot):
+        sub.add_argument("lat", type=float)
+        sub.add_argument("lon", type=float)
+        sub.add_argument("--tz", default="Asia/Kolkata", help="IANA timezone (default: Asia/Kolkata)")
+    render_cmd.add_argument("data", help=".json or .npz day data")
+    render_cmd.add_argument("--tz", help="timezone of the data, only lunar eclipses at night there are marked")
+    generate.add_argument("-o", "--output", dest="data_output", required=True,
+                          help=".json or .npz output path")
+    plot.add_argument("--data-output", help="also save the day data here")
+    for sub in (render_cmd, plot):
+        sub.add_argument("--name", required=True, help="city name for the title")
+        sub.add_argument("--coordinates", help="subtitle (default: from lat/lon)")
+        sub.add_argument("-o", "--output", help="output path without extension (default: the name)")
+        sub.add_argument("--formats", default="png,pdf",
+                         help="comma separated output formats (default: png,pdf)")
+        sub.add_argument("--png-dpi", type=int, help="PNG resolution (default: 300)")
+        sub.add_argument("--strip-height", type=int, nargs="?", const=1024,
+                         help="draw the PNG this many rows at a time to bound memory (default when given: 1024)")
+        sub.add_argument("--preview", type=int, metavar="PIXELS",
+                         help="also write OUTPUT_preview.png this many pixels on its long edge")
+    args = parser.parse_args()
+
+    socket_path = args.socket or DEFAULT_SOCKET
+    if args.daemon:
+        run_daemon(socket_path, args.year)
+        return
+    if args.command is None:
+        parser.error("a command or --daemon is required")
+
+    job = {"command": args.command, "year": args.year, "data_output": None}
+    for key, value in vars(args).items():
+        if key in ("lat", "lon", "tz", "data", "data_output", "name", "coordinates", "output", "png_dpi",
+                   "strip_height", "preview"):
+            job[key] = value
+    if args.command == "render":
+        job["data"] = os.path.abspath(args.data)
+        job["lat"] = job["lon"] = None
+        job["tz"] = args.tz
+        if not args.coordinates:
+            parser.error("render needs --coordinates")
+    if args.command != "generate":
+        job["output"] = os.path.abspath(args.output or args.name)
+        job["formats"] = args.formats.split(",")
+    if job["data_output"]:
+        job["data_output"] = os.path.abspath(job["data_output"])
+
+    reply = send_job(args.socket, job) if args.socket else None
+    if reply is None:
+        if args.socket:
+            print(f"no daemon on {args.socket}, running locally", file=sys.stderr)
+        reply = {"ok": True, "written": run_job(job)}
+    if not reply["ok"]:
+        sys.exit(reply["error"])
+    for path in reply["written"]:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
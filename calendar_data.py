@@ -0,0 +1,267 @@
+import calendar
+import csv
+import dataclasses
+import datetime
+import json
+
+import numpy as np
+
+import ephemeris
+import events
+import metrics
+
+# Day data files. JSON is the original pretty-printed export; .npz keeps one
+# fixed-point int16 column per series (value * SCALE), which is lossless for
+# the 3 decimals we round to and ~20x smaller. Pairs are stored as
+# "<key>.dawn" / "<key>.dusk" columns, the polar states as their own int8 array.
+# Both formats record the calendar year the days belong to.
+
+SCALE = 1000
+MISSING = np.iinfo(np.int16).min
+
+MOON_CYCLE = 28  # moon.phase() runs 0 (new) .. 14 (full) .. 28
+
+# series behind each column of CalendarData.polar, "sunrise" stands for sunrise/sunset
+POLAR_COLUMNS = ("sunrise", "civil", "nautical", "astro")
+
+
+@dataclasses.dataclass
+class CalendarData:
+    # local hours per day; twilight series are (days, 2) arrays of (dawn, dusk)
+    sunrise: np.ndarray
+    sunset: np.ndarray
+    noon: np.ndarray
+    moon_phases: np.ndarray
+    civil: np.ndarray
+    nautical: np.ndarray
+    astro: np.ndarray
+    days_in_month: np.ndarray
+    # (days, 4) int8 ephemeris.CROSSES/ABOVE/BELOW per POLAR_COLUMNS; None in
+    # files written before it was stored
+    polar: np.ndarray = None
+    # calendar year of the days; None in files written before it was stored
+    year: int = None
+
+    @classmethod
+    def from_dict(cls, data):
+        names = [field.name for field in dataclasses.fields(cls)]
+        arrays = {key: value for key, value in to_arrays(data).items() if key in names}
+        if "year" in arrays:
+            arrays["year"] = int(arrays["year"])
+        return cls(**arrays)
+
+    def as_dict(self):
+        return {field.name: getattr(self, field.name) for field in dataclasses.fields(self)}
+
+
+def fill_gaps(columns, periods=0):
+    # Linear gap fill of a (series, days) array in one pass. NaN days (the sun
+    # never reaching a depression) get the line through the valid days on either
+    # side; leading/trailing gaps extend the first/last segment. Rows with a
+    # period > 0 wrap, so e.g. moon phase goes 27 -> 0 instead of back through 14.
+    columns = np.array(columns, dtype=float)
+    missing = np.isnan(columns)
+    if not missing.any():
+        return columns
+    periods = np.broadcast_to(np.asarray(periods, dtype=float), columns.shape[:1])[:, np.newaxis]
+    num_days = columns.shape[1]
+    days = np.arange(num_days)
+
+    # nearest valid day at or before / at or after every day, -1 / num_days if none
+    before = np.maximum.accumulate(np.where(missing, -1, days), axis=1)
+    after = np.minimum.accumulate(np.where(missing, num_days, days)[:, ::-1], axis=1)[:, ::-1]
+
+    first = after[:, :1]
+    last = before[:, -1:]
+    second = np.take_along_axis(after, np.minimum(first + 1, num_days - 1), axis=1)
+    second_last = np.take_along_axis(before, np.maximum(last - 1, 0), axis=1)
+    # a single valid day extends flat
+    second = np.where(second >= num_days, first, second)
+    second_last = np.where(second_last < 0, last, second_last)
+
+    start = np.where(before < 0, first, np.where(after >= num_days, second_last, before))
+    end = np.where(before < 0, second, np.where(after >= num_days, last, after))
+    start = np.clip(start, 0, num_days - 1)
+    end = np.clip(end, 0, num_days - 1)
+
+    start_values = np.take_along_axis(columns, start, axis=1)
+    step = np.take_along_axis(columns, end, axis=1) - start_values
+    circular = periods > 0
+    step = np.where(circular, (step + periods / 2) % np.where(circular, periods, 1) - periods / 2, step)
+    span = np.where(end == start, 1, end - start)
+    filled = start_values + (days - start) / span * step
+    filled = np.where(circular, filled % np.where(circular, periods, 1), filled)
+
+    columns[missing] = filled[missing]
+    return columns
+
+
+def moon_phases(dates):
+    # Moon phase calculation (approximate), identical to astral's moon.phase
+    # new moon = 0, full moon = 14, new moon = 28
+    return events.moon_phase(dates)
+
+
+def fill_polar(arrays, polar):
+    # arrays with every day that has no crossing set from its polar state, see
+    # ephemeris.polar_times
+    filled = dict(arrays)
+    noon = arrays["noon"]
+    filled["sunrise"], filled["sunset"] = ephemeris.polar_times(arrays["sunrise"], arrays["sunset"], polar[:, 0], noon)
+    for i, key in enumerate(POLAR_COLUMNS[1:], start=1):
+        filled[key] = np.column_stack(ephemeris.polar_times(*arrays[key].T, polar[:, i], noon))
+    return filled
+
+
+def compute_calendar_data(lat, lon, tz, year, grid=None):
+    # grid: a location_grid.LocationGrid for the year, looked up instead of solving
+    if grid is not None and grid.year != year:
+        raise ValueError(f"location grid is for {grid.year}, not {year}")
+    with metrics.stage("ephemeris"):
+        solar = grid.lookup(lat, lon, tz) if grid is not None else ephemeris.compute_year(lat, lon, tz, year)
+        solar["moon_phases"] = moon_phases(ephemeris.year_dates(year))
+    metrics.count("days_solved", len(solar["noon"]))
+    # days the sun stays above or below a depression, one per series
+    metrics.count("days_no_crossing", np.count_nonzero(solar["polar"]))
+
+    polar = solar.pop("polar")
+    names, columns = flat_columns(fill_polar(solar, polar))
+    # the polar states account for every missing crossing of a solve; only grid
+    # lookups next to a cell where the state changes can still leave a gap
+    periods = [MOON_CYCLE if name == "moon_phases" else 0 for name in names]
+    with metrics.stage("gap_fill"):
+        data = from_columns(names, fill_gaps(columns, periods))
+    data["days_in_month"] = np.array([calendar.monthrange(year, m)[1] for m in range(1, 13)], dtype=np.int16)
+    data["polar"] = polar
+    data["year"] = year
+    return CalendarData.from_dict(data)
+
+
+def to_arrays(data):
+    # (dawn, dusk) pairs become (days, 2) arrays, everything else 1-D
+    if isinstance(data, CalendarData):
+        data = data.as_dict()
+    arrays = {}
+    for key, value in data.items():
+        if value is None:
+            continue
+        dtype = {"days_in_month": np.int16, "polar": np.int8, "year": int}.get(key, float)
+        arrays[key] = np.asarray(value, dtype=dtype)
+    return arrays
+
+
+def iter_day_chunks(lat, lon, tz, start, end, chunk_days=366):
+    # (dates, series) chunks over any date range, leap days included. Unlike
+    # compute_calendar_data nothing is filled: a day without a crossing stays NaN
+    # and chunk["polar"] says why.
+    for dates, chunk in ephemeris.iter_chunks(lat, lon, tz, start, end, chunk_days):
+        chunk["moon_phases"] = moon_phases(dates)
+        yield dates, chunk
+
+
+def iter_days(lat, lon, tz, start, end, chunk_days=366):
+    # one record per day: {"date": datetime.date, "sunrise": ..., "civil": (dawn, dusk), ...}
+    for dates, chunk in iter_day_chunks(lat, lon, tz, start, end, chunk_days):
+        for i, date in enumerate(dates.astype(datetime.date)):
+            record = {"date": date}
+            for key, value in chunk.items():
+                record[key] = tuple(value[i]) if value.ndim == 2 else value[i]
+            yield record
+
+
+def flat_columns(arrays):
+    # 1-D series as they are, (days, 2) pairs as "<key>.dawn" / "<key>.dusk"
+    names = []
+    columns = []
+    for key, value in arrays.items():
+        if key in ("days_in_month", "polar", "year"):
+            continue
+        if value.ndim == 2:
+            names += [f"{key}.dawn", f"{key}.dusk"]
+            columns += [value[:, 0], value[:, 1]]
+        else:
+            names.append(key)
+            columns.append(value)
+    return names, columns
+
+
+def from_columns(names, columns):
+    # inverse of flat_columns
+    data = {}
+    for name, column in zip(names, columns):
+        key, _, part = name.partition(".")
+        if part == "dawn":
+            data[key] = np.column_stack((column, columns[names.index(f"{key}.dusk")]))
+        elif not part:
+            data[key] = column
+    return data
+
+
+def write_csv(path, chunks):
+    # streams iter_day_chunks output to one row per day, written chunk by chunk;
+    # missing crossings are empty cells and the polar.* columns say why
+    # (1 the sun stays above that depression, -1 it never reaches it)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        header = None
+        for dates, chunk in chunks:
+            names, columns = flat_columns(chunk)
+            if header is None:
+                header = names
+                writer.writerow(["date", *names, *(f"polar.{key}" for key in POLAR_COLUMNS)])
+            cells = np.char.mod("%.3f", np.array(columns)).astype(object)
+            cells[np.isnan(columns)] = ""
+            writer.writerows(zip(dates.astype(str), *cells, *chunk["polar"].T))
+
+
+def save_json(path, data):
+    rounded = {key: np.round(value, 3).tolist() for key, value in to_arrays(data).items()}
+    with open(path, "w") as f:
+        json.dump(rounded, f, indent=4)
+
+
+def save_npz(path, data):
+    # all series share one (columns, days) int16 block so loading is a single read
+    arrays = to_arrays(data)
+    names, columns = flat_columns(arrays)
+    fixed = np.round(np.array(columns) * SCALE)
+    fixed[np.isnan(fixed)] = MISSING
+    optional = {key: arrays[key] for key in ("polar", "year") if key in arrays}
+    np.savez_compressed(path, names=np.array(names), columns=fixed.astype(np.int16),
+                        days_in_month=arrays["days_in_month"], **optional)
+
+
+def load_json(path):
+    with open(path, "r") as f:
+        return CalendarData.from_dict(json.load(f))
+
+
+def load_npz(path):
+    with np.load(path) as f:
+        names = f["names"].tolist()
+        fixed = f["columns"]
+        days_in_month = f["days_in_month"]
+        polar = f["polar"] if "polar" in f.files else None
+        year = f["year"] if "year" in f.files else None
+    columns = fixed / SCALE
+    columns[fixed == MISSING] = np.nan
+
+    data = from_columns(names, columns)
+    data["days_in_month"] = days_in_month
+    data["polar"] = polar
+    data["year"] = year
+    return CalendarData.from_dict(data)
+
+
+def save_data(path, data):
+    with metrics.stage("serialize"):
+        if str(path).endswith(".npz"):
+            save_npz(path, data)
+        else:
+            save_json(path, data)
+
+
+def load_data(path):
+    if str(path).endswith(".npz"):
+        return load_npz(path)
+    return load_json(path)
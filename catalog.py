@@ -0,0 +1,108 @@
+import csv
+import dataclasses
+import itertools
+import re
+import sys
+import zlib
+
+# Locations to make calendars for, streamed a row at a time from a CSV or TSV
+# catalog so a 100k+ row dump never sits in memory. A catalog either has a
+# header naming its columns (name, lat, lon, tz and an optional id; the usual
+# aliases such as latitude or timezone work too) or is a headerless GeoNames
+# dump (cities500.txt, allCountries.txt, ...). Rows without coordinates or a
+# timezone are skipped with a warning.
+
+COLUMN_ALIASES = {
+    "name": ("name", "city", "asciiname"),
+    "lat": ("lat", "latitude"),
+    "lon": ("lon", "lng", "long", "longitude"),
+    "tz": ("tz", "timezone", "time_zone"),
+    "id": ("id", "geonameid", "geoname_id"),
+}
+# https://download.geonames.org/export/dump/readme.txt
+GEONAMES_COLUMNS = {"id": 0, "name": 1, "lat": 4, "lon": 5, "tz": 17}
+
+
+@dataclasses.dataclass(frozen=True)
+class Place:
+    name: str
+    lat: float
+    lon: float
+    tz: str
+    key: str  # unique and stable, used for sharding and the resume journal
+    stem: str  # output file name without extension
+
+
+def make_place(name, lat, lon, tz, place_id=None):
+    # catalogs repeat town names, so an id (when there is one) goes into the file names
+    safe_name = re.sub(r"[^\w\-. ]", "_", name).strip() or "place"
+    if place_id:
+        return Place(name, lat, lon, tz, f"id:{place_id}", f"{safe_name}_{place_id}")
+    return Place(name, lat, lon, tz, f"{name}@{lat},{lon}", safe_name)
+
+
+def header_columns(header):
+    # column index of each field, or None when the first row is not a header
+    fields = [field.strip().lower() for field in header]
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in fields:
+                columns[key] = fields.index(alias)
+                break
+    if not {"name", "lat", "lon", "tz"} <= columns.keys():
+        return None
+    return columns
+
+
+def read_places(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        first = f.readline()
+        if "\t" in first:
+            # GeoNames fields hold bare quotes, TSV is never quoted
+            reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+            header = first.rstrip("\r\n").split("\t")
+        else:
+            reader = csv.reader(f)
+            header = next(csv.reader([first]))
+        columns = header_columns(header)
+        line_number = 1
+        if columns is None:
+            if len(header) <= max(GEONAMES_COLUMNS.values()):
+                raise ValueError(f"{path}: no name/lat/lon/tz header and not a GeoNames dump")
+            columns = GEONAMES_COLUMNS
+            line_number = 0
+            reader = itertools.chain([header], reader)
+
+        for row in reader:
+            line_number += 1
+            try:
+                name = row[columns["name"]].strip()
+                lat = float(row[columns["lat"]])
+                lon = float(row[columns["lon"]])
+                tz = row[columns["tz"]].strip()
+                valid = name and tz and -90 <= lat <= 90 and -180 <= lon <= 180
+            except (IndexError, ValueError):
+                valid = False
+            if not valid:
+                print(f"{path}:{line_number}: skipping row without a name, coordinates or timezone",
+                      file=sys.stderr)
+                continue
+            place_id = row[columns["id"]].strip() if "id" in columns and len(row) > columns["id"] else None
+            yield make_place(name, lat, lon, tz, place_id)
+
+
+def parse_shard(text):
+    # "i/N", 1-based: shard 1/4 .. 4/4
+    index, _, count = text.partition("/")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"shard must be i/N with 1 <= i <= N, not {text}")
+    return index, count
+
+
+def in_shard(place, shard):
+    # by a hash of the place key, so every node picks the same places whatever
+    # order the catalog lists them in
+    index, count = shard
+    return zlib.crc32(place.key.encode()) % count == index - 1
@@ -0,0 +1,150 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Vectorized NOAA solar position equations (same model astral uses), evaluated
+# for a whole year at once instead of one sun() call per day.
+# https://gml.noaa.gov/grad/solcalc/calcdetails.html
+
+# bump when a change alters computed values, it invalidates cached ephemeris
+ENGINE_VERSION = 2
+
+SUNRISE_DEPRESSION = 0.833  # refraction + solar disc radius
+TWILIGHT_DEPRESSIONS = {"civil": 6, "nautical": 12, "astro": 18}
+
+# extra bands can be passed to compute_year(bands=...), negative is above the horizon
+GOLDEN_HOUR_DEPRESSION = -6
+BLUE_HOUR_DEPRESSION = 4
+
+# what the sun does about one depression on a day: crosses it twice, stays above
+# it all day (polar day, or twilight that never ends) or never reaches it (polar night)
+CROSSES, ABOVE, BELOW = 0, 1, -1
+
+
+def year_dates(year):
+    return np.arange(np.datetime64(f"{year}-01-01"), np.datetime64(f"{year + 1}-01-01"))
+
+
+def date_range(start, end):
+    # every day in [start, end), anything np.datetime64 takes ("1950-01-01", a date, ...)
+    return np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"))
+
+
+def utc_offsets(dates, tz):
+    # hours east of UTC at local noon for every date, follows DST changes
+    zone = ZoneInfo(tz)
+    offsets = np.empty(len(dates))
+    for i, date in enumerate(dates.astype(datetime.date)):
+        local_noon = datetime.datetime(date.year, date.month, date.day, 12, tzinfo=zone)
+        offsets[i] = local_noon.utcoffset().total_seconds() / 3600
+    return offsets
+
+
+def solar_geometry(dates, lon):
+    # declination (radians) and equation of time (minutes) at approximate transit
+    julian_day = dates.astype("datetime64[D]").astype(float) + 2440587.5 + 0.5 - lon / 360
+    t = (julian_day - 2451545.0) / 36525.0
+
+    mean_long = np.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anom = np.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccent = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+
+    center = (np.sin(mean_anom) * (1.914602 - t * (0.004817 + 0.000014 * t))
+              + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * t)
+              + np.sin(3 * mean_anom) * 0.000289)
+    omega = np.radians(125.04 - 1934.136 * t)
+    apparent_long = np.radians(np.degrees(mean_long) + center - 0.00569 - 0.00478 * np.sin(omega))
+
+    mean_obliq = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+
+    declination = np.arcsin(np.sin(obliq) * np.sin(apparent_long))
+
+    y = np.tan(obliq / 2) ** 2
+    eq_time = 4 * np.degrees(
+        y * np.sin(2 * mean_long)
+        - 2 * eccent * np.sin(mean_anom)
+        + 4 * eccent * y * np.sin(mean_anom) * np.cos(2 * mean_long)
+        - 0.5 * y * y * np.sin(4 * mean_long)
+        - 1.25 * eccent * eccent * np.sin(2 * mean_anom)
+    )
+    return declination, eq_time
+
+
+def cos_hour_angle(lat, declination, depression):
+    # below -1 the sun stays above the depression all day, above 1 it never reaches it
+    lat = np.radians(lat)
+    zenith = np.radians(90 + depression)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (np.cos(zenith) / (np.cos(lat) * np.cos(declination))
+                - np.tan(lat) * np.tan(declination))
+
+
+def hour_angle(lat, declination, depression):
+    # NaN where the sun never reaches the given depression on that day
+    with np.errstate(invalid="ignore"):
+        return np.degrees(np.arccos(cos_hour_angle(lat, declination, depression)))
+
+
+def polar_states(lat, declination, depressions):
+    # CROSSES/ABOVE/BELOW, shape (len(depressions), days)
+    cos_ha = cos_hour_angle(lat, declination, np.asarray(depressions, dtype=float)[:, np.newaxis])
+    return np.select([cos_ha < -1, cos_ha > 1], [ABOVE, BELOW], CROSSES).astype(np.int8)
+
+
+def polar_times(dawn, dusk, states, noon):
+    # dawn/dusk with the days that have no crossing filled in from their state:
+    # above the depression all day spans 0-24 h, never reaching it is an empty
+    # span at solar noon. Drawn as bands, that is exactly what the sky does.
+    above = states == ABOVE
+    below = states == BELOW
+    return (np.where(above, 0, np.where(below, noon, dawn)),
+            np.where(above, 24, np.where(below, noon, dusk)))
+
+
+def day_geometry(dates, lon, tz):
+    # one solar solve per day: local solar noon (hours) and declination
+    declination, eq_time = solar_geometry(dates, lon)
+    noon = (720 - 4 * lon - eq_time) / 60 + utc_offsets(dates, tz)
+    return noon, declination
+
+
+def crossing_times(lat, noon, declination, depressions):
+    # (dawn, dusk) in local hours, shape (len(depressions), days), from one geometry solve
+    depressions = np.asarray(depressions, dtype=float)[:, np.newaxis]
+    ha = hour_angle(lat, declination, depressions) / 15
+    return (noon - ha) % 24, (noon + ha) % 24
+
+
+def compute_days(lat, lon, tz, dates, bands=None):
+    # sunrise/sunset/noon and a (dawn, dusk) pair per band in local hours for every
+    # date, NaN without a crossing; "polar" is the (days, 1 + bands) polar_states
+    # of the sunrise and band depressions
+    if bands is None:
+        bands = TWILIGHT_DEPRESSIONS
+    noon, declination = day_geometry(dates, lon, tz)
+    depressions = [SUNRISE_DEPRESSION, *bands.values()]
+    dawn, dusk = crossing_times(lat, noon, declination, depressions)
+
+    result = {"sunrise": dawn[0], "sunset": dusk[0], "noon": noon % 24}
+    for i, name in enumerate(bands, start=1):
+        result[name] = np.column_stack((dawn[i], dusk[i]))
+    result["polar"] = polar_states(lat, declination, depressions).T
+    return result
+
+
+def compute_year(lat, lon, tz, year, bands=None):
+    return compute_days(lat, lon, tz, year_dates(year), bands)
+
+
+def iter_chunks(lat, lon, tz, start, end, chunk_days=366, bands=None):
+    # (dates, compute_days result) for [start, end) in fixed-size pieces, so a
+    # range of any length is computed in constant memory
+    start = np.datetime64(start, "D")
+    end = np.datetime64(end, "D")
+    while start < end:
+        stop = min(start + chunk_days, end)
+        dates = np.arange(start, stop)
+        yield dates, compute_days(lat, lon, tz, dates, bands)
+        start = stop
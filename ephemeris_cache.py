@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import calendar_data
+import ephemeris
+
+# On-disk cache of computed CalendarData, content-addressed by everything that
+# can change the arrays. Entries are plain float .npz files so a hit returns
+# exactly what compute_calendar_data would; the file mtime doubles as the LRU
+# clock and the oldest entries are evicted once the directory exceeds max_bytes.
+
+
+class EphemerisCache:
+    def __init__(self, directory, max_bytes=256 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, lat, lon, tz, year):
+        params = {
+            "lat": lat,
+            "lon": lon,
+            "tz": tz,
+            "year": year,
+            "depressions": [ephemeris.SUNRISE_DEPRESSION, ephemeris.TWILIGHT_DEPRESSIONS],
+            "engine": ephemeris.ENGINE_VERSION,
+        }
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def get(self, lat, lon, tz, year):
+        path = os.path.join(self.directory, self.key(lat, lon, tz, year) + ".npz")
+        try:
+            with np.load(path) as f:
+                data = calendar_data.CalendarData.from_dict({name: f[name] for name in f.files})
+        except (OSError, ValueError, TypeError):
+            self.misses += 1
+            data = calendar_data.compute_calendar_data(lat, lon, tz, year)
+            self.put(path, data)
+            return data
+
+        self.hits += 1
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # another worker evicted it since it was read
+            pass
+        return data
+
+    def put(self, path, data):
+        # write to a temp name first so concurrent workers never read half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **data.as_dict())
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
@@ -0,0 +1,219 @@
+import dataclasses
+import functools
+
+import numpy as np
+
+# Moon phases, eclipses and meteor showers for any year, evaluated over whole
+# time arrays. Lunar terms are the largest ones of Meeus, Astronomical
+# Algorithms ch. 47 (elongation to ~0.02 deg, a couple of minutes in time) and
+# eclipse screening follows ch. 54. Instants are numpy datetime64[s] in UTC.
+
+SYNODIC_MONTH = 29.530588861
+
+@dataclasses.dataclass(frozen=True)
+class MeteorShower:
+    name: str
+    peak_longitude: float  # solar longitude of the peak, J2000 degrees
+    days_before: int
+    days_after: int
+
+
+# https://www.imo.net/resources/calendar/
+# major ones - quadrantids, perseids, and geminids; the activity windows are the ones the calendar always drew
+METEOR_SHOWERS = (
+    MeteorShower("Quadrantids", 283.15, 2, 9),
+    MeteorShower("Perseids", 140.0, 26, 12),
+    MeteorShower("Geminids", 262.2, 10, 6),
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Eclipse:
+    instant: np.datetime64
+    body: str  # "lunar" or "solar"
+    kind: str  # lunar: total/partial/penumbral, solar: central/partial
+    magnitude: float  # umbral for lunar, penumbral if it never reaches the umbra; NaN for solar
+
+
+@dataclasses.dataclass(frozen=True)
+class MeteorWindow:
+    name: str
+    peak: np.datetime64
+    start: np.datetime64
+    end: np.datetime64
+
+
+def julian_day(times):
+    return np.asarray(times, dtype="datetime64[s]").astype(float) / 86400 + 2440587.5
+
+
+def delta_t(jd):
+    # TT - UT in days; rough fit to observed/predicted values, within ~10 s for 1950-2050
+    year = 2000 + (jd - 2451545.0) / 365.25
+    return np.interp(year, [1950, 1975, 2000, 2025, 2050, 2100], [29, 46, 64, 69, 93, 202]) / 86400
+
+
+def fundamental_arguments(jd):
+    # mean elongation D, sun anomaly M, moon anomaly M', argument of latitude F
+    # (unwrapped degrees) and the eccentricity factor E
+    t = (jd + delta_t(jd) - 2451545.0) / 36525
+    d = 297.8501921 + 445267.1114034 * t - 0.0018819 * t**2 + t**3 / 545868
+    m = 357.5291092 + 35999.0502909 * t - 0.0001536 * t**2
+    m1 = 134.9633964 + 477198.8675055 * t + 0.0087414 * t**2 + t**3 / 69699
+    f = 93.2720950 + 483202.0175233 * t - 0.0036539 * t**2
+    e = 1 - 0.002516 * t - 0.0000074 * t**2
+    return d, m, m1, f, e, t
+
+
+# D, M, M', F multipliers and sine coefficient (1e-6 deg) of the moon's longitude
+MOON_LONGITUDE_TERMS = np.array([
+    (0, 0, 1, 0, 6288774), (2, 0, -1, 0, 1274027), (2, 0, 0, 0, 658314),
+    (0, 0, 2, 0, 213618), (0, 1, 0, 0, -185116), (0, 0, 0, 2, -114332),
+    (2, 0, -2, 0, 58793), (2, -1, -1, 0, 57066), (2, 0, 1, 0, 53322),
+    (2, -1, 0, 0, 45758), (0, 1, -1, 0, -40923), (1, 0, 0, 0, -34720),
+    (0, 1, 1, 0, -30383), (2, 0, 0, -2, 15327), (0, 0, 1, 2, -12528),
+    (0, 0, 1, -2, 10980), (4, 0, -1, 0, 10675), (0, 0, 3, 0, 10034),
+    (4, 0, -2, 0, 8548), (2, 1, -1, 0, -7888), (2, 1, 0, 0, -6766),
+    (1, 0, -1, 0, -5163), (1, 1, 0, 0, 4987), (2, -1, 1, 0, 4036),
+    (2, 0, 2, 0, 3994),
+])
+
+
+def sun_center(m, t):
+    m = np.radians(m)
+    return (np.sin(m) * (1.914602 - t * (0.004817 + 0.000014 * t))
+            + np.sin(2 * m) * (0.019993 - 0.000101 * t)
+            + np.sin(3 * m) * 0.000289)
+
+
+def elongation(jd):
+    # geocentric moon - sun longitude in degrees, unwrapped so it only increases
+    d, m, m1, f, e, t = fundamental_arguments(jd)
+    multipliers = MOON_LONGITUDE_TERMS[:, :4]
+    arguments = np.radians(np.stack((d, m, m1, f), axis=-1) @ multipliers.T)
+    amplitude = MOON_LONGITUDE_TERMS[:, 4] * 1e-6 * e[..., np.newaxis] ** np.abs(multipliers[:, 1])
+    return d + np.sum(amplitude * np.sin(arguments), axis=-1) - sun_center(m, t)
+
+
+def sun_longitude(jd):
+    # true solar longitude referred to the J2000 equinox, unwrapped degrees
+    d, m, m1, f, e, t = fundamental_arguments(jd)
+    mean_long = 280.46646 + 36000.76983 * t + 0.0003032 * t**2
+    return mean_long + sun_center(m, t) - 1.397 * t
+
+
+def crossings(function, start, end, phase):
+    # instants in [start, end) where an increasing angle passes phase + 360k,
+    # bracketed on a daily grid and refined with Newton steps on the local rate
+    days = np.arange(np.datetime64(start, "D") - 1, np.datetime64(end, "D") + 1)
+    jd = julian_day(days)
+    angle = function(jd)
+    turns = np.floor((angle - phase) / 360)
+    i = np.nonzero(np.diff(turns))[0]
+    target = turns[i + 1] * 360 + phase
+    rate = angle[i + 1] - angle[i]
+    x = jd[i] + (target - angle[i]) / rate
+    for _ in range(3):
+        x -= (function(x) - target) / rate
+    instants = np.datetime64("1970-01-01T00:00:00") + np.round((x - 2440587.5) * 86400).astype("timedelta64[s]")
+    return instants[(instants >= np.datetime64(start, "s")) & (instants < np.datetime64(end, "s"))]
+
+
+def moon_phase(dates):
+    # same value as astral.moon.phase(date) for every date (0 new, 14 full, 28 new),
+    # including its low-precision series and whole-degree truncation
+    jd = julian_day(np.asarray(dates, dtype="datetime64[D]"))
+    dt = (jd - 2382148) ** 2 / (41048480 * 86400)
+    t = (jd + dt - 2451545.0) / 36525
+    d = np.radians((297.85 + 445267.1115 * t - 0.0016300 * t**2 + t**3 / 545868) % 360.0)
+    m = np.radians((357.53 + 35999.0503 * t) % 360.0)
+    m1 = np.radians((134.96 + 477198.8676 * t + 0.0089970 * t**2 + t**3 / 69699) % 360.0)
+    elong = np.degrees(d) + 6.29 * np.sin(m1)
+    elong -= 2.10 * np.sin(m)
+    elong += 1.27 * np.sin(2 * d - m1)
+    elong += 0.66 * np.sin(2 * d)
+    elong = np.floor(elong % 360.0)
+    phase = (elong + 6.43) / 360 * 28
+    return np.where(phase >= 28, phase - 28, phase)
+
+
+def year_bounds(year):
+    return np.datetime64(f"{year}-01-01"), np.datetime64(f"{year + 1}-01-01")
+
+
+def frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+@functools.lru_cache(maxsize=None)
+def full_moons(year):
+    return frozen(crossings(elongation, *year_bounds(year), 180))
+
+
+@functools.lru_cache(maxsize=None)
+def new_moons(year):
+    return frozen(crossings(elongation, *year_bounds(year), 0))
+
+
+def eclipse_at(instant, body):
+    # Meeus ch. 54. gamma is the least distance of the moon's shadow axis (solar)
+    # or of the moon from the shadow axis (lunar) in earth radii. The series is
+    # in the mean arguments of the lunation k at its mean phase, not the true instant.
+    k = (julian_day(instant) - 2451550.09766) / SYNODIC_MONTH
+    k = np.round(k - 0.5) + 0.5 if body == "lunar" else np.round(k)
+    t = k / 1236.85
+    e = 1 - 0.002516 * t - 0.0000074 * t**2
+    m = np.radians(2.5534 + 29.10535670 * k - 0.0000014 * t**2)
+    m1 = np.radians(201.5643 + 385.81693528 * k + 0.0107582 * t**2 + 0.00001238 * t**3)
+    f = np.radians(160.7108 + 390.67050284 * k - 0.0016118 * t**2 - 0.00000227 * t**3)
+    omega = np.radians(124.7746 - 1.56375588 * k + 0.0020672 * t**2)
+    f = f - np.radians(0.02665) * np.sin(omega)
+    p = (0.2070 * e * np.sin(m) + 0.0024 * e * np.sin(2 * m) - 0.0392 * np.sin(m1)
+         + 0.0116 * np.sin(2 * m1) - 0.0073 * e * np.sin(m1 + m) + 0.0067 * e * np.sin(m1 - m)
+         + 0.0118 * np.sin(2 * f))
+    q = (5.2207 - 0.0048 * e * np.cos(m) + 0.0020 * e * np.cos(2 * m) - 0.3299 * np.cos(m1)
+         - 0.0060 * e * np.cos(m1 + m) + 0.0041 * e * np.cos(m1 - m))
+    gamma = abs((p * np.cos(f) + q * np.sin(f)) * (1 - 0.0048 * abs(np.cos(f))))
+    u = 0.0059 + 0.0046 * e * np.cos(m) - 0.0182 * np.cos(m1) + 0.0004 * np.cos(2 * m1) - 0.0005 * np.cos(m + m1)
+
+    if body == "solar":
+        if gamma > 1.5433 + u:
+            return None
+        return Eclipse(instant, body, "central" if gamma < 0.9972 else "partial", float("nan"))
+    umbral = (1.0128 - u - gamma) / 0.5450
+    penumbral = (1.5573 + u - gamma) / 0.5450
+    if penumbral <= 0:
+        return None
+    if umbral >= 1:
+        kind = "total"
+    elif umbral > 0:
+        kind = "partial"
+    else:
+        return Eclipse(instant, body, "penumbral", float(penumbral))
+    return Eclipse(instant, body, kind, float(umbral))
+
+
+@functools.lru_cache(maxsize=None)
+def eclipses(year):
+    # every lunar (at full moon) and solar (at new moon) eclipse of the year, in time order
+    found = [eclipse_at(instant, "lunar") for instant in full_moons(year)]
+    found += [eclipse_at(instant, "solar") for instant in new_moons(year)]
+    return tuple(sorted((eclipse for eclipse in found if eclipse), key=lambda eclipse: eclipse.instant))
+
+
+@functools.lru_cache(maxsize=None)
+def meteor_showers(year, catalog=METEOR_SHOWERS):
+    # one window per catalog shower whose peak falls in the year
+    windows = []
+    for shower in catalog:
+        for peak in crossings(sun_longitude, *year_bounds(year), shower.peak_longitude):
+            windows.append(MeteorWindow(shower.name, peak,
+                                        peak - np.timedelta64(shower.days_before * 86400, "s"),
+                                        peak + np.timedelta64(shower.days_after * 86400, "s")))
+    return tuple(windows)
+
+
+def day_of_year(instants, year):
+    # fractional days since Jan 1 00:00 UTC, the unit calendar angles are drawn in
+    return (np.asarray(instants, dtype="datetime64[s]") - np.datetime64(f"{year}-01-01", "s")) / np.timedelta64(1, "D")
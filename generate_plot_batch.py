@@ -1,17 +1,25 @@
+import argparse
+import collections
+import contextlib
+import dataclasses
+import functools
+import io
 import json
-import matplotlib.pyplot as plt
-import numpy as np
-from matplotlib.patches import Circle
-from matplotlib.font_manager import FontProperties
-import astral
-from astral import LocationInfo
-from astral.sun import sun
-import datetime
-import numpy as np
-from scipy.interpolate import interp1d
-
-import json
-from astral import moon
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import build_manifest
+import calendar_data
+import catalog
+import ephemeris
+import metrics
+import render
+from ephemeris_cache import EphemerisCache
+from location_grid import LocationGrid
 
 city_names = [
     "Delhi",
@@ -33,329 +41,310 @@ cities_coordinates = [(28.5909, 77.2183), (19.2066, 72.9081), (12.9774, 77.5950)
 # city_names = ['']
 # cities_coordinates = [()]
 
-year = 2025
-months = range(1, 13)
-days_in_month = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-
-for city_name, city_coordinates in zip(city_names, cities_coordinates):
-    lat, lon = city_coordinates
-    city = LocationInfo(city_name, 'India', 'Asia/Kolkata', lat, lon)
-    sunrise_times = []
-    sunset_times = []
-    noon_times = []
-
-    moon_phases = []
-    civil_twilight = []
-    nautical_twilight = []
-    astronomical_twilight = []
-    print(f"generating {city_name}")
-    
-    day_of_year = 0
-    for m in months:
-        for d in range(1, days_in_month[m - 1] + 1):
-            date = datetime.date(year, m, d)
-            try:
-                s = sun(city.observer, date=date, tzinfo=city.tzinfo, dawn_dusk_depression=6)
-                sunrise = s["sunrise"].hour + s["sunrise"].minute / 60
-                sunset = s["sunset"].hour + s["sunset"].minute / 60
-                noon = s["noon"].hour + s["noon"].minute / 60
-                dawn = s["dawn"].hour + s["dawn"].minute / 60
-                dusk = s["dusk"].hour + s["dusk"].minute / 60
-                nautical = sun(city.observer, date=date, tzinfo=city.tzinfo, dawn_dusk_depression = 12)
-                astro = sun(city.observer, date=date, tzinfo=city.tzinfo, dawn_dusk_depression = 18)
-                dawn_nautical = nautical["dawn"].hour + nautical["dawn"].minute / 60
-                dusk_nautical = nautical["dusk"].hour + nautical["dusk"].minute / 60
-                dawn_astro = astro["dawn"].hour + astro["dawn"].minute / 60
-                dusk_astro = astro["dusk"].hour + astro["dusk"].minute / 60
-                # Moon phase calculation (approximate)
-                # new moon = 0, full moon = 14, new moon = 28
-                moon_phase =  astral.moon.phase(date)
-
-            except Exception as e:
-                print(f"Error calculating sunrise/sunset for {date}: {e}. Interpolating later")
-                # library not converging - https://github.com/sffjunkie/astral/issues/86
-                sunrise = sunset = moon_phase = noon = dawn = dusk = dawn_nautical = dusk_nautical = dawn_astro = dusk_astro = -1
-            
-            sunrise_times.append(sunrise)
-            sunset_times.append(sunset)
-            moon_phases.append(moon_phase)
-            noon_times.append(noon)
-            civil_twilight.append((dawn, dusk))
-            nautical_twilight.append((dawn_nautical, dusk_nautical))
-            astronomical_twilight.append((dawn_astro, dusk_astro))
-            day_short_name = date.strftime('%a')
-            day_of_year += 1
-
-    def interpolate_missing_values(times):
-        if isinstance(times[0], tuple):
-            first_values = np.array([t[0] for t in times])
-            second_values = np.array([t[1] for t in times])
-            first_values = interpolate_array(first_values)
-            second_values = interpolate_array(second_values)
-            interpolated_values = list(zip(first_values, second_values))
-            return interpolated_values
+# how often a running batch writes its manifest, so an interrupted run keeps
+# what it built; a big catalog's manifest is too large to rewrite every city
+MANIFEST_SAVE_SECONDS = 30
+
+
+def default_places():
+    return [catalog.make_place(name, lat, lon, "Asia/Kolkata") for name, (lat, lon) in zip(city_names, cities_coordinates)]
+
+
+def generate_plot(place, data_format="json", cache=None, formats=("png", "pdf"), grid=None,
+                  export_options=None, preview=None, manifest=None, views=(render.FULL_VIEW,), year=2025):
+    # place is a catalog.Place; with a build_manifest.BuildManifest, outputs whose
+    # inputs are unchanged are kept: fresh day data is loaded instead of
+    # recomputed, and only the image formats that are stale get rendered
+    city_name, lat, lon, tz, stem = place.name, place.lat, place.lon, place.tz, place.stem
+    data_path = f"{stem}_data.{data_format}" if data_format != "none" else None
+    data_inputs = {"lat": lat, "lon": lon, "tz": tz, "year": year, "engine": ephemeris.ENGINE_VERSION,
+                   "depressions": [ephemeris.SUNRISE_DEPRESSION, ephemeris.TWILIGHT_DEPRESSIONS],
+                   "grid": None if grid is None else [grid.lats.tolist(), grid.lons.tolist()]}
+    if manifest and data_path and manifest.fresh(data_path, data_inputs):
+        data = calendar_data.load_data(data_path)
+    else:
+        print(f"generating {city_name}")
+        if grid is not None:
+            data = calendar_data.compute_calendar_data(lat, lon, tz, year, grid)
+        elif cache is not None:
+            data = cache.get(lat, lon, tz, year)
         else:
-            return interpolate_array(times)
-
-    def interpolate_array(times):    
-        times = np.array(times, dtype=float)
-        valid_indices = np.where(times != -1)[0]
-        valid_values = times[valid_indices]
-
-        interp_func = interp1d(valid_indices, valid_values, kind='linear', fill_value='extrapolate')
-        invalid_indices = np.where(times == -1)[0]
-        interpolated_values = interp_func(invalid_indices)
-        times[invalid_indices] = interpolated_values
-        return times.tolist()
-
-    def interpolate_circular(times, max_value=28):
-        times = np.array(times, dtype=float)
-        times[times != -1] /= max_value
-
-        valid_indices = np.where(times != -1)[0]
-        valid_values = times[valid_indices]
-
-        interp_func = interp1d(valid_indices, valid_values, kind='linear', fill_value='extrapolate')
-        invalid_indices = np.where(times == -1)[0]
-        interpolated_values = interp_func(invalid_indices)
-        interpolated_values *= max_value
-        interpolated_values %= max_value
-
-        times[invalid_indices] = interpolated_values
-        return times.tolist()
-
-    sunrise_times = interpolate_missing_values(sunrise_times)
-    sunset_times = interpolate_missing_values(sunset_times)
-    noon_times = interpolate_missing_values(noon_times)
-    civil_twilight = interpolate_missing_values(civil_twilight)
-    nautical_twilight = interpolate_missing_values(nautical_twilight)
-    astronomical_twilight = interpolate_missing_values(astronomical_twilight)
-    moon_phases = interpolate_missing_values(moon_phases)
-
-    smoothed_sunrise = sunrise_times
-    smoothed_sunset = sunset_times
-
-    def round_values(data):
-        def round_nested(value):
-            if isinstance(value, list):
-                return [round_nested(v) for v in value]
-            elif isinstance(value, tuple):
-                return tuple(round_nested(v) for v in value)
-            elif isinstance(value, (int, float)):
-                return round(value, 3)
-            else:
-                return value
-
-        return {key: round_nested(value) for key, value in data.items()}
-
-    data = {
-        "sunrise": smoothed_sunrise,
-        "sunset": smoothed_sunset,
-        "days_in_month": days_in_month,
-        "moon_phases": moon_phases,
-        "noon": noon_times,
-        "civil": civil_twilight,
-        "nautical": nautical_twilight,
-        "astro": astronomical_twilight,
-    }
-    rounded_data = round_values(data)
-
-    with open(f"{city_name}_data.json", "w") as f:
-        json.dump(rounded_data, f, indent=4)
-
-    # https://www.timeanddate.com/eclipse/2025
-    total_lunar_eclipse_day_index = 250 #7 sep in 365 days
-
-    # https://www.rmg.co.uk/stories/topics/meteor-shower-guide
-    # peak day index, start of shower, end of shower tuples of major ones - quadrantids, perseids, and geminids
-    meteor_showers = [(3, 1, 12), (224, 198, 236), (348, 338, 354)]
-
-    with open(f"{city_name}_data.json", "r") as f:
-        data = json.load(f)
-        
-    sunrise_times = data["sunrise"]
-    sunset_times = data["sunset"]
-    days_in_month = data["days_in_month"]
-    moon_phases = data["moon_phases"]
-    noon_times = data["noon"]
-    civil_twilight = data["civil"]
-    nautical_twilight = data["nautical"]
-    astronomical_twilight = data["astro"]
-    civil_twilight_dawn, civil_twilight_dusk = zip(*civil_twilight)
-    nautical_twilight_dawn, nautical_twilight_dusk = zip(*nautical_twilight)
-    astronomical_twilight_dawn, astronomical_twilight_dusk = zip(*astronomical_twilight)
-
-    fig, ax = plt.subplots(figsize=(24, 24), subplot_kw=dict(polar=True), dpi=300)
-    fig.patch.set_facecolor('#faf0e6')  
-    ax.set_theta_direction(-1)
-    ax.set_theta_offset(np.pi / 2)
-
-    num_days = len(sunrise_times)
-    sunrise_r = np.array(sunrise_times + [sunrise_times[0]]) / 24
-    sunset_r = np.array(sunset_times + [sunset_times[0]]) / 24
-    noon_r = np.array(noon_times + [noon_times[0]]) / 24
-    dawn_r = np.array(list(civil_twilight_dawn) + [civil_twilight_dawn[0]]) / 24
-    dusk_r = np.array(list(civil_twilight_dusk) + [civil_twilight_dusk[0]]) / 24
-    dawn_nautical_r = np.array(list(nautical_twilight_dawn) + [nautical_twilight_dawn[0]]) / 24
-    dusk_nautical_r = np.array(list(nautical_twilight_dusk) + [nautical_twilight_dusk[0]]) / 24
-    dawn_astro_r = np.array(list(astronomical_twilight_dawn) + [astronomical_twilight_dawn[0]]) / 24
-    dusk_astro_r = np.array(list(astronomical_twilight_dusk) + [astronomical_twilight_dusk[0]]) / 24
-
-    theta = np.linspace(0, 2 * np.pi, len(sunrise_r), endpoint=True)
-
-    # Night
-    ax.fill_between(theta, sunset_r, 1, color='#011F26', zorder=2)
-    ax.fill_between(theta, 0, sunrise_r, color='#011F26', zorder=2)
-
-    # Day
-    ax.fill_between(theta, sunrise_r, sunset_r, color='#fbba43', zorder=2)
-
-    ax.fill_between(theta, dawn_r, sunrise_r, color='#1C5C7C', zorder=2, alpha=0.85)
-    ax.fill_between(theta, sunset_r, dusk_r, color='#1C5C7C', zorder=2, alpha=0.85)
-    ax.fill_between(theta, dawn_nautical_r, dawn_r, color='#0A3F4D', zorder=2, alpha=0.7)
-    ax.fill_between(theta, dusk_r, dusk_nautical_r, color='#0A3F4D', zorder=2,  alpha=0.7)
-    ax.fill_between(theta, dawn_astro_r, dawn_nautical_r, color='#092A38', zorder=2,  alpha=0.8)
-    ax.fill_between(theta, dusk_nautical_r, dusk_astro_r, color='#092A38', zorder=2,  alpha=0.8)
-    ax.fill_between(theta, noon_r - 0.002, noon_r + 0.002, color='#FFFACD', alpha=0.05, zorder=3)
-
-    months_labels = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
-    cumulative_days = np.cumsum(days_in_month)
-    month_ticks = [(cumulative_days[i - 1] if i > 0 else 0) + days_in_month[i] / 2 for i in range(12)]
-    month_ticks_rad = [tick / num_days * 2 * np.pi for tick in month_ticks]
-    ax.set_xticks(month_ticks_rad)
-    ax.set_xticklabels([])
-    label_height = 1.1
-    for angle, label in zip(month_ticks_rad, months_labels):
-        ax.text(angle, label_height, label, horizontalalignment='center', fontsize=22, color="#2F4F4F", fontweight='bold')
-
-
-    for i in range(12):
-        angle = cumulative_days[i] / num_days * 2 * np.pi if i < 11 else 2 * np.pi
-        ax.plot([angle, angle], [0, 1.2], color='#02735E', linewidth=0.5, zorder=3)
-
-    closest_full_moon_days = []
-    i = 0
-    while i < len(moon_phases):
-        if 13.5 <= moon_phases[i] <= 14.5:
-            closest_day = i
-            min_diff = abs(moon_phases[i] - 14)
-            j = i + 1
-            while j < len(moon_phases) and 13.5 <= moon_phases[j] <= 14.5:
-                diff = abs(moon_phases[j] - 14)
-                if diff < min_diff:
-                    min_diff = diff
-                    closest_day = j
-                j += 1
-            closest_full_moon_days.append(closest_day+1)
-            i = j
-        else:
-            i += 1
-            
-    marker_radius = 0.97
-    marker_size = 100
-    for day_index in closest_full_moon_days:
-        angle = day_index / num_days * 2 * np.pi
-        ax.scatter(angle, marker_radius, s=marker_size, color='#A1A2A6', marker='o', zorder=4)
-
-    angle = total_lunar_eclipse_day_index / num_days * 2 * np.pi
-    halo_radius = marker_radius
-    halo = Circle((angle, halo_radius), radius=0.009, color='white', alpha=0.7, zorder=4)
-    ax.add_patch(halo)
-    ax.scatter(angle, marker_radius, s=marker_size, color='black', marker='o', zorder=5)
-
-    first_sunday = 5
-    sundays = [(first_sunday + i * 7) for i in range(52)]
-
-    for i, day_index in enumerate(sundays):
-        angle = day_index / num_days * 2 * np.pi
-        month_index = 0
-        for i in range(len(days_in_month)):
-            if day_index > sum(days_in_month[:i+1]):
-                month_index += 1
-            else:
-                break
-        month_day = day_index - sum(days_in_month[:month_index])
-        label_radius = 1.02
-        rotation = -np.degrees(angle)
-        rotation = (rotation + 180) % 360 - 180
-        angle_deg = np.degrees(angle)
-        angle_deg = (angle_deg + 360) % 360
-        def scaled(val):
-            return (val ** 3 * (1 - val)*0.7 + val) * 0.015 #handcoded 
-        if 0 <= angle_deg <= 90:
-            diff = (angle_deg / 90)
-            label_radius -= scaled(diff)
-        elif 90 < angle_deg <= 180: 
-            diff = 1 - (angle_deg - 90) / 90
-            label_radius += scaled(diff)
-        elif 180 < angle_deg <= 270:
-            diff = (angle_deg - 180) / 90
-            label_radius -= scaled(diff)
-        elif 270 < angle_deg < 360:
-            diff = 1-(angle_deg - 270) / 90
-            label_radius += scaled(diff)
-
-        ha = 'center'
-        va = 'center'
-        if -90 < rotation < 90:
-            ha = 'left'
+            data = calendar_data.compute_calendar_data(lat, lon, tz, year)
+        if data_path:
+            calendar_data.save_data(data_path, data)
+            metrics.count(f"bytes.{data_format}", os.path.getsize(data_path))
+            if manifest:
+                manifest.record(data_path, data_inputs)
+
+    coordinates_str = render.format_coordinates(lat, lon)
+    if manifest:
+        render_inputs = {"data": build_manifest.data_digest(data), "name": city_name, "coordinates": coordinates_str,
+                         "tz": tz, "year": year, "renderer": build_manifest.renderer_digest()}
+    rendered = False
+    # every view renders from the same data, on its own cached template
+    for view in views:
+        view_stem = stem if view == render.FULL_VIEW else f"{stem}_{view.name}"
+        outputs = {f"{view_stem}.{fmt}": ({"format": fmt, **(export_options or {})}, fmt) for fmt in formats}
+        if preview:
+            outputs[f"{view_stem}_preview.png"] = ({"format": "png", "png_size": preview}, None)
+        if manifest:
+            view_inputs = {**render_inputs, "view": dataclasses.asdict(view)}
+            outputs = {path: (options, fmt) for path, (options, fmt) in outputs.items()
+                       if not manifest.fresh(path, {**view_inputs, **options})}
+            if not outputs:
+                continue
+
+        print(f"rendering {view_stem}")
+        rendered = True
+        with metrics.stage("figure"):
+            fig = render.calendar_template(year, view=view).render(data, city_name, coordinates_str, tz)
+        stale_formats = [fmt for _, fmt in outputs.values() if fmt]
+        if stale_formats:
+            render.save_figure(fig, view_stem, stale_formats, **(export_options or {}))
+        if f"{view_stem}_preview.png" in outputs:
+            render.save_figure(fig, f"{view_stem}_preview", ["png"], png_size=preview)
+        for path, (options, _) in outputs.items():
+            metrics.count(f"bytes.{options['format']}", os.path.getsize(path))
+            if manifest:
+                manifest.record(path, {**view_inputs, **options})
+    if not rendered:
+        print(f"{city_name} is up to date")
+
+
+@functools.lru_cache(maxsize=1)
+def worker_manifest(path):
+    # parsed once per worker process rather than per city: a big catalog's
+    # manifest is tens of MB of JSON. Workers only read it; what they build
+    # goes back to the parent to merge
+    return build_manifest.BuildManifest(path)
+
+
+def process_city(place, data_format="json", cache_dir=None, cache_size=None, formats=("png", "pdf"),
+                 grid_path=None, export_options=None, preview=None, profile_dir=None, manifest_path=None,
+                 views=(render.FULL_VIEW,), year=2025):
+    # runs in a worker process; a failing city is reported instead of raised
+    cache = EphemerisCache(cache_dir, cache_size) if cache_dir else None
+    log = io.StringIO()
+    error = None
+    profile_path = os.path.join(profile_dir, f"{place.stem}.prof") if profile_dir else None
+    manifest = worker_manifest(manifest_path) if manifest_path else None
+    with contextlib.redirect_stdout(log), metrics.recording(profile_path) as recorded:
+        try:
+            grid = LocationGrid.load(grid_path) if grid_path else None
+            generate_plot(place, data_format, cache, formats, grid, export_options, preview, manifest, views, year)
+        except Exception:
+            error = traceback.format_exc()
+    stats = cache.stats() if cache else {}
+    built = {}
+    if manifest:
+        # only this place's outputs, the manifest serves the worker's next one
+        built, manifest.built = manifest.built, {}
+    return place, error, log.getvalue(), stats, recorded.as_dict(), built
+
+
+def bounded_map(new_executor, function, items, jobs, window, crashed):
+    # like executor.map in order, but with at most window tasks submitted ahead,
+    # so a streamed catalog is only read as fast as it is rendered. A worker that
+    # dies outright (OOM kill, segfault) breaks the whole pool and every item
+    # still in it fails, so which one killed it is unknown: those items are rerun
+    # one at a time in a single-worker pool next to a fresh shared one, and only
+    # an item that breaks that pool too is yielded as crashed(item, error).
+    # new_executor(max_workers=n) makes a pool
+    executors = {False: new_executor(max_workers=jobs), True: None}
+    pending = collections.deque()  # [item, future, alone]
+
+    def submit(item, alone):
+        if executors[alone] is None:
+            executors[alone] = new_executor(max_workers=1)
+        return executors[alone].submit(function, item)
+
+    def rerun_broken(alone):
+        # the pool is gone; its items without a result start over alone
+        executors[alone].shutdown(wait=False)
+        executors[alone] = None if alone else new_executor(max_workers=jobs)
+        for entry in pending:
+            future = entry[1]
+            if entry[2] == alone and (not future.done() or isinstance(future.exception(), BrokenProcessPool)):
+                entry[1:] = [submit(entry[0], True), True]
+
+    def next_result():
+        entry = pending[0]
+        while True:
+            item, future, alone = entry
+            try:
+                result = future.result()
+            except BrokenProcessPool as error:
+                if alone:
+                    # the single worker runs its items in order, so it died on this one
+                    pending.popleft()
+                    rerun_broken(True)
+                    return crashed(item, error)
+                rerun_broken(False)
+                continue
+            pending.popleft()
+            return result
+
+    try:
+        for item in items:
+            pending.append([item, submit(item, False), False])
+            if len(pending) >= window:
+                yield next_result()
+        while pending:
+            yield next_result()
+    finally:
+        for executor in executors.values():
+            if executor is not None:
+                executor.shutdown()
+
+
+def crashed_city(place, error):
+    # process_city's result for a place whose worker process died
+    return place, f"worker process died: {error!r}\n", "", {}, metrics.Metrics().as_dict(), {}
+
+
+def read_journal(path):
+    # keys of the places a previous run of this shard finished
+    try:
+        with open(path) as f:
+            return {line.rstrip("\n") for line in f}
+    except FileNotFoundError:
+        return set()
+
+
+def report(results, metrics_file=None, manifest=None, journal=None):
+    # map yields in submission order, so logs come out in city order; with a
+    # metrics_file every city's stage timings and counters go there as a JSON line,
+    # every place that finished is appended to the journal as soon as it does,
+    # and the manifest is saved every MANIFEST_SAVE_SECONDS along the way
+    failed = []
+    totals = collections.Counter()
+    records = []
+    saved_at = time.monotonic()
+    for place, error, log, stats, recorded, built in results:
+        print(log, end="")
+        if manifest:
+            manifest.update(built)
+            if built and time.monotonic() - saved_at >= MANIFEST_SAVE_SECONDS:
+                manifest.save()
+                saved_at = time.monotonic()
+        totals.update(stats)
+        if error:
+            print(f"failed {place.name}:\n{error}", file=sys.stderr)
+            failed.append(place.name)
+        elif journal:
+            journal.write(place.key + "\n")
+            journal.flush()
+        if metrics_file:
+            metrics_file.write(json.dumps({"city": place.name, "key": place.key, "ok": error is None, **recorded}) + "\n")
+            records.append(recorded)
+    if totals:
+        print(f"ephemeris cache: {totals['cache_hits']} hits, {totals['cache_misses']} misses")
+    if records:
+        print(metrics.summary(records))
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate polar calendars for a batch of cities")
+    parser.add_argument("--year", type=int, default=2025, help="calendar year (default: 2025)")
+    parser.add_argument("--catalog",
+                        help="CSV/TSV of places (name, lat, lon, tz columns, or a GeoNames dump) to use "
+                             "instead of the built-in cities, read as it goes")
+    parser.add_argument("--shard", type=catalog.parse_shard, metavar="I/N",
+                        help="only do the places of shard I of N (1-based), picked by a hash of each place")
+    parser.add_argument("--journal",
+                        help="append every finished place here and skip the ones already in it, so an "
+                             "interrupted run resumes; deleted once a run ends without failures "
+                             "(default with --catalog: <catalog>.done, per shard)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes, 0 uses every core (default: 1)")
+    parser.add_argument("--format", choices=["json", "npz", "none"], default="json",
+                        help="day data file format, npz is the compact binary one, none skips "
+                             "writing it (default: json)")
+    parser.add_argument("--formats", default="png,pdf",
+                        help="comma separated output formats, saved with one shared tight-bbox layout pass "
+                             "(default: png,pdf)")
+    parser.add_argument("--views", default="full",
+                        help="comma separated views rendered from each city's data: full, dawn, dusk or a "
+                             "START-END hour window such as 5-8.5, written as {city}_{view} (default: full)")
+    parser.add_argument("--cache-dir",
+                        help="reuse computed ephemeris from this directory across runs")
+    parser.add_argument("--cache-size", type=float, default=256,
+                        help="ephemeris cache size cap in MB, least recently used entries are "
+                             "evicted (default: 256)")
+    parser.add_argument("--grid",
+                        help="look cities up in a grid built by location_grid.py (path without "
+                             "extension) instead of solving each one")
+    parser.add_argument("--pdf-dpi", type=int,
+                        help="flatten the sun/twilight fills and hour rings of the PDF into one opaque "
+                             "image at this dpi, text and lines stay vector (default: all vector)")
+    parser.add_argument("--png-dpi", type=int,
+                        help="PNG resolution, same layout at any dpi (default: 300)")
+    parser.add_argument("--strip-height", type=int, nargs="?", const=render.STRIP_HEIGHT,
+                        help="draw the PNG this many rows at a time so large prints fit in little "
+                             f"memory (default when given: {render.STRIP_HEIGHT})")
+    parser.add_argument("--preview", type=int, metavar="PIXELS",
+                        help="also write a {city}_preview.png thumbnail this many pixels on its long edge")
+    parser.add_argument("--metrics",
+                        help="write per-city stage timings and counters to this JSON lines file and "
+                             "print a summary table")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="dump a cProfile of every city to DIR/{city}.prof")
+    parser.add_argument("--manifest", nargs="?", const="build_manifest.json",
+                        help="only rebuild outputs whose inputs changed since the run that wrote this "
+                             "manifest (default when given: build_manifest.json)")
+    args = parser.parse_args()
+
+    try:
+        views = [render.parse_view(view) for view in args.views.split(",")]
+    except ValueError as e:
+        parser.error(str(e))
+    places = catalog.read_places(args.catalog) if args.catalog else default_places()
+    if args.shard:
+        places = (place for place in places if catalog.in_shard(place, args.shard))
+    journal_path = args.journal
+    if journal_path is None and args.catalog:
+        shard = f".{args.shard[0]}-of-{args.shard[1]}" if args.shard else ""
+        journal_path = f"{os.path.basename(args.catalog)}{shard}.done"
+    if journal_path:
+        done = read_journal(journal_path)
+        if done:
+            print(f"resuming from {journal_path}: skipping {len(done)} places an earlier run finished",
+                  file=sys.stderr)
+        places = (place for place in places if place.key not in done)
+
+    jobs = args.jobs or os.cpu_count()
+    worker = functools.partial(process_city, data_format=args.format, cache_dir=args.cache_dir,
+                               cache_size=int(args.cache_size * 2**20), formats=args.formats.split(","),
+                               grid_path=args.grid,
+                               export_options={"raster_dpi": args.pdf_dpi, "png_dpi": args.png_dpi,
+                                               "strip_height": args.strip_height},
+                               preview=args.preview, profile_dir=args.profile, manifest_path=args.manifest,
+                               views=views, year=args.year)
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+    with contextlib.ExitStack() as stack:
+        metrics_file = stack.enter_context(open(args.metrics, "w")) if args.metrics else None
+        manifest = build_manifest.BuildManifest(args.manifest) if args.manifest else None
+        journal = stack.enter_context(open(journal_path, "a")) if journal_path else None
+        if jobs > 1:
+            results = bounded_map(ProcessPoolExecutor, worker, places, jobs, 4 * jobs, crashed_city)
+            failed = report(results, metrics_file, manifest, journal)
         else:
-            ha = 'right'
-        ax.text(angle, label_radius, str(month_day), ha=ha, va=va, fontsize=16, color='#696969', rotation=rotation, zorder=5, fontweight='bold') 
-
-    hour_labels_to_display = ['1AM', '4AM', '7AM', '10AM', '1PM', '4PM', '7PM', '10PM']
-    hour_ticks_to_display = [x / 24 for x in range(1, 24, 3)]
-    for i, label in enumerate(hour_labels_to_display):
-        angle_rad = 75 * np.pi / 180
-        radius = hour_ticks_to_display[i]
-        ax.text(angle_rad, radius, label, ha='left', va='center', fontsize=9, color='#e7fdeb', zorder=10)
-        
-    for tick in hour_ticks_to_display:
-        ax.fill_between(theta, tick-0.0005, tick+0.0005, color='gray', alpha=0.4, zorder=3, linewidth=0)
-
-    for shower in meteor_showers:
-        peak_day, start_day, end_day = shower
-        start_angle = start_day / num_days * 2 * np.pi
-        end_angle = end_day / num_days * 2 * np.pi
-        peak_angle = peak_day / num_days * 2 * np.pi
-        
-        if shower == meteor_showers[0]:  # Quadrantids
-            num_lines = int((end_day - start_day) / 1.2) 
-            scale = 0.03 # Sharper peak
-            skew = 1.8  # Faster rise, slower fall
-        elif shower == meteor_showers[1]:  # Perseids
-            num_lines = int((end_day - start_day) / 2.5)
-            scale = 0.12  # Broader peak
-            skew = 1.2  # Moderate asymmetry
-        else:  # Geminids
-            num_lines = int((end_day - start_day) / 2)
-            scale = 0.09 # Slightly more defined peak
-            skew = 1.3 # Moderate asymmetry
-        beta_samples = np.random.beta(2, 2*skew, num_lines)
-        random_angles = start_angle + beta_samples * (end_angle - start_angle)
-        peak_idx = np.abs(random_angles - peak_angle).argmin()
-        random_angles[peak_idx] = peak_angle
-        random_angles = np.append(random_angles, [start_angle, end_angle])
-        random_radii = np.random.uniform(0.91, 0.928, num_lines + 2)
-        radius_inc = np.random.uniform(0.001, 0.008, num_lines + 2)
-        for radius, angle, change in zip(random_radii, random_angles, radius_inc):
-            ax.plot([angle, angle], [radius, radius + change], color='white', linewidth=0.4, zorder=6, alpha=0.65 + change * 20)    
-        
-        ax.plot([peak_angle, peak_angle], [0.95, 0.97], color='white', linewidth=0.25, zorder=6, alpha=1)
-        ax.plot([peak_angle - 0.002, peak_angle - 0.002], [0.9, 0.94], color='white', linewidth=0.3, zorder=6, alpha=1)
-        ax.plot([peak_angle + 0.003, peak_angle + 0.003], [0.92, 0.95], color='white', linewidth=0.25, zorder=6, alpha=0.9)
-
-    font_system = FontProperties(fname='Arvo-Bold.ttf' , weight='bold', size=64)
-    ax.text(0.5, 1.18, city_name, ha='center', va='center', fontproperties=font_system, transform=ax.transAxes)
-    font_system = FontProperties(fname='Arvo-Regular.ttf', size=20)
-    coordinates_str = f"{city_coordinates[0]}°N, {city_coordinates[1]}°E"
-    ax.text(0.5, 1.14, coordinates_str, ha='center', va='center', fontproperties=font_system, transform=ax.transAxes)
-    font_system = FontProperties(fname='Arvo-Regular.ttf', size=48)
-    ax.text(0.5, 1.23, "2025", ha='center', va='center', fontproperties=font_system, transform=ax.transAxes)
-
-    ax.set_ylim(0, 1.05)
-    ax.set_yticklabels([])
-    plt.subplots_adjust(top=0.9)
-
-    plt.savefig(f'{city_name}.png', bbox_inches='tight', pad_inches=1)
-    plt.savefig(f'{city_name}.pdf', bbox_inches='tight', pad_inches=1)
\ No newline at end of file
+            failed = report(map(worker, places), metrics_file, manifest, journal)
+        if manifest:
+            manifest.save()
+
+    if failed:
+        print(f"{len(failed)} places failed: {', '.join(failed)}", file=sys.stderr)
+        if journal_path:
+            print(f"rerun to retry them, {journal_path} skips the rest", file=sys.stderr)
+        sys.exit(1)
+    # the journal only resumes an interrupted run; a finished one starts afresh
+    # next time, leaving what is up to date to the manifest
+    if journal_path:
+        os.remove(journal_path)
+
+
+if __name__ == "__main__":
+    main()
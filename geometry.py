@@ -0,0 +1,89 @@
+import calendar
+import dataclasses
+import functools
+
+import numpy as np
+
+# Where every day, month and date label of a year goes on the polar calendar,
+# computed once per year and shared by every view. Angles are radians
+# clockwise from the top (the axes set the direction and offset); day i's
+# band runs from theta[i] to theta[i + 1] and its labels and markers sit on
+# the far edge, theta[i + 1].
+
+MONTH_LABELS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+LABEL_RADIUS = 1.02
+
+
+@dataclasses.dataclass(frozen=True)
+class CalendarGeometry:
+    year: int
+    num_days: int
+    days_in_month: np.ndarray
+    theta: np.ndarray  # num_days + 1 band edges, 0 .. 2 pi
+    day_angles: np.ndarray  # label/marker angle of every day
+    month: np.ndarray  # 1 .. 12
+    month_day: np.ndarray  # 1 .. 31
+    weekday: np.ndarray  # 0 Monday .. 6 Sunday
+    month_tick_angles: np.ndarray  # middle of each month
+    divider_angles: np.ndarray  # end of each month, the last one is 2 pi
+    label_radius: np.ndarray  # date label radius of every day, eased so labels clear the rim
+    label_rotation: np.ndarray  # degrees, -180 .. 180
+    label_ha: np.ndarray  # 'left' on the right half, 'right' on the left half
+
+    def angle(self, day):
+        # fractional day of year (0 = Jan 1 00:00) to angle
+        return np.asarray(day) / self.num_days * 2 * np.pi
+
+    @property
+    def sundays(self):
+        return np.nonzero(self.weekday == 6)[0]
+
+
+def eased_offset(val):
+    return (val ** 3 * (1 - val) * 0.7 + val) * 0.015  # handcoded
+
+
+def label_radii(angles):
+    # hand-tuned nudge per quadrant so the rotated (and flipped at 90/270 degrees)
+    # labels line up along the rim
+    angle_deg = np.degrees(angles) % 360
+    offsets = [-eased_offset(angle_deg / 90),
+               eased_offset(1 - (angle_deg - 90) / 90),
+               -eased_offset((angle_deg - 180) / 90)]
+    conditions = [angle_deg <= 90, angle_deg <= 180, angle_deg <= 270]
+    return LABEL_RADIUS + np.select(conditions, offsets, eased_offset(1 - (angle_deg - 270) / 90))
+
+
+@functools.lru_cache(maxsize=None)
+def calendar_geometry(year):
+    num_days = 366 if calendar.isleap(year) else 365
+    dates = np.arange(np.datetime64(f"{year}-01-01"), np.datetime64(f"{year + 1}-01-01"))
+    months = dates.astype("datetime64[M]")
+    days_in_month = np.array([calendar.monthrange(year, m)[1] for m in range(1, 13)])
+    month_ends = np.cumsum(days_in_month)
+
+    theta = np.linspace(0, 2 * np.pi, num_days + 1, endpoint=True)
+    day_angles = theta[1:]
+    rotation = (-np.degrees(day_angles) + 180) % 360 - 180
+
+    geometry = CalendarGeometry(
+        year=year,
+        num_days=num_days,
+        days_in_month=days_in_month,
+        theta=theta,
+        day_angles=day_angles,
+        month=months.astype(int) % 12 + 1,
+        month_day=(dates - months).astype(int) + 1,
+        # 1970-01-01 was a Thursday
+        weekday=(dates.astype(int) + 3) % 7,
+        month_tick_angles=(month_ends - days_in_month / 2) / num_days * 2 * np.pi,
+        divider_angles=np.append(month_ends[:11] / num_days * 2 * np.pi, 2 * np.pi),
+        label_radius=label_radii(day_angles),
+        label_rotation=rotation,
+        label_ha=np.where((-90 < rotation) & (rotation < 90), 'left', 'right'),
+    )
+    for field in dataclasses.fields(geometry):
+        value = getattr(geometry, field.name)
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+    return geometry
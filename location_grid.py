@@ -0,0 +1,155 @@
+import argparse
+import functools
+import json
+
+import numpy as np
+
+import ephemeris
+
+# Precomputed sunrise/sunset/noon/twilight tables over a lat/lon grid, so a
+# calendar for any town inside the grid is a 4-cell interpolation instead of a
+# solve. Times are stored in UTC hours and not wrapped at 24, which keeps them
+# smooth across cells; the timezone offset is applied at lookup.
+#
+# Error bound: with a 0.25 degree grid, interpolated times stay within 0.05 min
+# of ephemeris.compute_year for every series on days where the sun crosses the
+# depression comfortably (all of India; sunrise/sunset/civil up to at least
+# 57N). In the weeks where a twilight band is about to stop ending, e.g.
+# nautical/astro dusk above ~48N around June, the crossing moves quickly with
+# latitude and the error reaches a few minutes; use a finer step there.
+# max_error() reports the worst case for a built grid. Days where any
+# neighbouring cell has no crossing come back as NaN.
+
+SERIES = ("sunrise", "sunset", "noon",
+          "civil.dawn", "civil.dusk", "nautical.dawn", "nautical.dusk", "astro.dawn", "astro.dusk")
+
+
+@functools.lru_cache(maxsize=64)
+def tz_offsets(tz, year):
+    return ephemeris.utc_offsets(ephemeris.year_dates(year), tz)
+
+
+class LocationGrid:
+    def __init__(self, lats, lons, year, times):
+        # times: (lat, lon, series, day) float32 UTC hours
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.year = year
+        self.times = times
+
+    @classmethod
+    def build(cls, lat_range, lon_range, step, year):
+        lats = np.arange(lat_range[0], lat_range[1] + step / 2, step)
+        lons = np.arange(lon_range[0], lon_range[1] + step / 2, step)
+        dates = ephemeris.year_dates(year)
+        depressions = [ephemeris.SUNRISE_DEPRESSION, *ephemeris.TWILIGHT_DEPRESSIONS.values()]
+
+        times = np.empty((len(lats), len(lons), len(SERIES), len(dates)), dtype=np.float32)
+        for j, lon in enumerate(lons):
+            declination, eq_time = ephemeris.solar_geometry(dates, lon)
+            noon = (720 - 4 * lon - eq_time) / 60
+            # (lat, depression, day) half-arcs in hours
+            ha = ephemeris.hour_angle(lats[:, None, None], declination,
+                                      np.array(depressions)[:, None]) / 15
+            times[:, j, 0] = noon - ha[:, 0]
+            times[:, j, 1] = noon + ha[:, 0]
+            times[:, j, 2] = noon
+            times[:, j, 3::2] = noon - ha[:, 1:]
+            times[:, j, 4::2] = noon + ha[:, 1:]
+        return cls(lats, lons, year, times)
+
+    def save(self, path):
+        # <path>.npy holds the dense array so load() can memory-map it
+        np.save(f"{path}.npy", self.times)
+        with open(f"{path}.json", "w") as f:
+            json.dump({"lats": self.lats.tolist(), "lons": self.lons.tolist(), "year": self.year,
+                       "series": SERIES, "engine": ephemeris.ENGINE_VERSION}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(f"{path}.json", "r") as f:
+            header = json.load(f)
+        if header["engine"] != ephemeris.ENGINE_VERSION or tuple(header["series"]) != SERIES:
+            raise ValueError(f"{path} was built by a different ephemeris engine, rebuild it")
+        times = np.load(f"{path}.npy", mmap_mode="r")
+        return cls(header["lats"], header["lons"], header["year"], times)
+
+    def cell(self, axis, value):
+        if not axis[0] <= value <= axis[-1]:
+            raise ValueError(f"{value} is outside the grid ({axis[0]} to {axis[-1]})")
+        i = min(np.searchsorted(axis, value, side="right") - 1, len(axis) - 2)
+        return i, (value - axis[i]) / (axis[i + 1] - axis[i])
+
+    def lookup_utc(self, lat, lon):
+        i, fy = self.cell(self.lats, lat)
+        j, fx = self.cell(self.lons, lon)
+        corners = self.times[i:i + 2, j:j + 2]
+        lower = (1 - fx) * corners[0, 0] + fx * corners[0, 1]
+        upper = (1 - fx) * corners[1, 0] + fx * corners[1, 1]
+        return (1 - fy) * lower + fy * upper
+
+    def lookup(self, lat, lon, tz):
+        # same keys and local-hour values as ephemeris.compute_year; the polar
+        # states are solved for the exact latitude, that is only the declination
+        local = (self.lookup_utc(lat, lon) + tz_offsets(tz, self.year)) % 24
+        declination, _ = ephemeris.solar_geometry(ephemeris.year_dates(self.year), lon)
+        depressions = [ephemeris.SUNRISE_DEPRESSION, *ephemeris.TWILIGHT_DEPRESSIONS.values()]
+        return {
+            "sunrise": local[0],
+            "sunset": local[1],
+            "noon": local[2],
+            "civil": local[3:5].T,
+            "nautical": local[5:7].T,
+            "astro": local[7:9].T,
+            "polar": ephemeris.polar_states(lat, declination, depressions).T,
+        }
+
+    def max_error(self):
+        # worst difference in minutes against a direct solve, at every cell midpoint
+        worst = 0.0
+        for lat in (self.lats[:-1] + self.lats[1:]) / 2:
+            for lon in (self.lons[:-1] + self.lons[1:]) / 2:
+                exact = ephemeris.compute_year(lat, lon, "UTC", self.year)
+                looked_up = self.lookup(lat, lon, "UTC")
+                for key, value in exact.items():
+                    if key == "polar":
+                        continue
+                    diff = np.abs(value - looked_up[key])
+                    diff = np.minimum(diff, 24 - diff)
+                    worst = max(worst, np.nanmax(diff, initial=0) * 60)
+        return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a precomputed sunrise/sunset location grid")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="precompute a grid")
+    build.add_argument("path", help="output path, writes <path>.npy and <path>.json")
+    build.add_argument("--lat", type=float, nargs=2, required=True, metavar=("MIN", "MAX"))
+    build.add_argument("--lon", type=float, nargs=2, required=True, metavar=("MIN", "MAX"))
+    build.add_argument("--step", type=float, default=0.25, help="grid spacing in degrees (default: 0.25)")
+    build.add_argument("--year", type=int, default=2025)
+    build.add_argument("--check", action="store_true", help="report the interpolation error bound")
+
+    lookup = subparsers.add_parser("lookup", help="print sunrise/sunset for a coordinate")
+    lookup.add_argument("path")
+    lookup.add_argument("lat", type=float)
+    lookup.add_argument("lon", type=float)
+    lookup.add_argument("--tz", default="Asia/Kolkata")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        grid = LocationGrid.build(args.lat, args.lon, args.step, args.year)
+        grid.save(args.path)
+        print(f"{len(grid.lats)}x{len(grid.lons)} grid for {args.year} written to {args.path}.npy")
+        if args.check:
+            print(f"max interpolation error {grid.max_error():.3f} min")
+    else:
+        solar = LocationGrid.load(args.path).lookup(args.lat, args.lon, args.tz)
+        for day, (sunrise, sunset) in enumerate(zip(solar["sunrise"], solar["sunset"]), start=1):
+            print(f"{day}\t{sunrise:.3f}\t{sunset:.3f}")
+
+
+if __name__ == "__main__":
+    main()
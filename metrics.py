@@ -0,0 +1,79 @@
+import collections
+import contextlib
+import cProfile
+import time
+
+# Wall and CPU time per named stage plus plain counters for one unit of work
+# (a city in the batch). Pipeline code calls stage() and count() everywhere;
+# they only record inside a recording() block and do nothing otherwise.
+# Stages should not nest, so the per-stage times add up to the total.
+
+current = None
+
+
+class Metrics:
+    def __init__(self):
+        self.stages = {}  # name -> [wall seconds, cpu seconds]
+        self.counters = collections.Counter()
+
+    def as_dict(self):
+        return {"stages": {name: {"wall": wall, "cpu": cpu} for name, (wall, cpu) in self.stages.items()},
+                "counters": dict(self.counters)}
+
+
+@contextlib.contextmanager
+def stage(name):
+    metrics = current
+    if metrics is None:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        totals = metrics.stages.setdefault(name, [0.0, 0.0])
+        totals[0] += time.perf_counter() - wall
+        totals[1] += time.process_time() - cpu
+
+
+def count(name, n=1):
+    if current is not None:
+        current.counters[name] += int(n)
+
+
+@contextlib.contextmanager
+def recording(profile_path=None):
+    # collects into a fresh Metrics; with profile_path the block also runs under
+    # cProfile and the stats are dumped there (open with pstats or snakeviz)
+    global current
+    previous, current = current, Metrics()
+    profiler = cProfile.Profile() if profile_path else None
+    try:
+        if profiler:
+            profiler.enable()
+        yield current
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        current = previous
+
+
+def summary(records):
+    # table of stage totals and counters over as_dict() records
+    stages = collections.defaultdict(lambda: [0.0, 0.0, 0])
+    counters = collections.Counter()
+    for record in records:
+        for name, timing in record["stages"].items():
+            totals = stages[name]
+            totals[0] += timing["wall"]
+            totals[1] += timing["cpu"]
+            totals[2] += 1
+        counters.update(record["counters"])
+
+    lines = [f"{'stage':<16} {'wall s':>9} {'cpu s':>9} {'mean wall ms':>13}"]
+    for name, (wall, cpu, n) in sorted(stages.items(), key=lambda item: -item[1][0]):
+        lines.append(f"{name:<16} {wall:9.3f} {cpu:9.3f} {wall / n * 1000:13.1f}")
+    for name, value in sorted(counters.items()):
+        lines.append(f"{name:<16} {value:>9}")
+    return "\n".join(lines)
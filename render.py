@@ -0,0 +1,583 @@
+import dataclasses
+import functools
+import io
+import struct
+import zlib
+
+import numpy as np
+from matplotlib.patches import Circle
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib import font_manager
+from matplotlib.font_manager import FontProperties
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.text import Text
+from matplotlib.transforms import Bbox
+from PIL import Image
+
+import calendar_data
+import ephemeris
+import events
+import geometry
+import metrics
+
+# the title fonts, loaded relative to the working directory
+FONT_FILES = ('Arvo-Regular.ttf', 'Arvo-Bold.ttf')
+
+# streaks per day of activity and beta skew of each shower's spread, anything
+# not listed gets the Geminids look
+meteor_styles = {
+    'Quadrantids': (1 / 1.2, 1.8),  # Sharper peak, faster rise, slower fall
+    'Perseids': (1 / 2.5, 1.2),  # Broader peak, moderate asymmetry
+    'Geminids': (1 / 2, 1.3),  # Slightly more defined peak, moderate asymmetry
+}
+
+
+def band_polygon(theta, inner, outer):
+    # closed outline between two radii, what fill_between would build
+    inner = np.broadcast_to(inner, theta.shape)
+    outer = np.broadcast_to(outer, theta.shape)
+    return np.concatenate((np.column_stack((theta, inner)), np.column_stack((theta[::-1], outer[::-1]))))
+
+
+def band_layers(data):
+    # (inner, outer, color, alpha) of the night, day and twilight bands in
+    # fractions of a day, closed over the year; drawn in list order. Days the
+    # polar states mark as having no crossing are drawn from the state (a band
+    # all day or none), whatever value the series holds for them.
+    def closed(hours):
+        return np.append(hours, hours[0]) / 24
+
+    def unwrapped(dawn, dusk):
+        # next to a polar day a dusk can fall after midnight (or a dawn before
+        # it) and wrap round the clock; on this day's ring the band then runs
+        # to the edge instead of backwards through the night
+        return (np.where(dawn > data.noon, 0, dawn), np.where(dusk < data.noon, 24, dusk))
+
+    if data.polar is not None:
+        data = calendar_data.CalendarData(**calendar_data.fill_polar(data.as_dict(), data.polar))
+
+    sunrise_r, sunset_r = map(closed, unwrapped(data.sunrise, data.sunset))
+    dawn_r, dusk_r = map(closed, unwrapped(*data.civil.T))
+    dawn_nautical_r, dusk_nautical_r = map(closed, unwrapped(*data.nautical.T))
+    dawn_astro_r, dusk_astro_r = map(closed, unwrapped(*data.astro.T))
+    return [
+        (sunset_r, 1, '#011F26', 1),  # Night
+        (0, sunrise_r, '#011F26', 1),
+        (sunrise_r, sunset_r, '#fbba43', 1),  # Day
+        (dawn_r, sunrise_r, '#1C5C7C', 0.85),
+        (sunset_r, dusk_r, '#1C5C7C', 0.85),
+        (dawn_nautical_r, dawn_r, '#0A3F4D', 0.7),
+        (dusk_r, dusk_nautical_r, '#0A3F4D', 0.7),
+        (dawn_astro_r, dawn_nautical_r, '#092A38', 0.8),
+        (dusk_nautical_r, dusk_astro_r, '#092A38', 0.8),
+    ]
+
+
+# zorder of the hour rings and noon line: over the bands (2) but under the
+# spine (2.5) and every other vector artist, so the raster layers are drawn
+# back to back and a hybrid PDF can flatten them into one image
+OVERLAY_ZORDER = 2.2
+
+
+def raster_layer(artist):
+    # heavy fills that hybrid PDFs draw as an image, see export_figure(raster_dpi=...)
+    artist.raster_layer = True
+    return artist
+
+
+def artist_count(fig):
+    return sum(1 for _ in fig.findobj())
+
+
+@functools.lru_cache(maxsize=None)
+def font(name, size, weight='normal'):
+    # FontProperties are reused across cities instead of rebuilt per render
+    return FontProperties(fname=name, weight=weight, size=size)
+
+
+class CalendarTemplate:
+    # The layers that only depend on the year (month labels and dividers, hour
+    # rings and labels, Sundays, full moons, meteor showers and the year title)
+    # are drawn once. render() swaps in the sun, twilight, eclipse and title
+    # layers of one city and returns the same figure every time.
+
+    def __init__(self, year=2025, eclipse_color='black', eclipse_halo=True):
+        self.year = year
+        self.geometry = geometry.calendar_geometry(year)
+        self.num_days = self.geometry.num_days
+        self.theta = self.geometry.theta
+        self.city_artists = []
+        self.eclipse_color = eclipse_color
+        self.eclipse_halo = eclipse_halo
+
+        # plain Figure on an Agg canvas: no pyplot figure manager keeps it alive
+        self.fig = Figure(figsize=(24, 24), dpi=300)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(polar=True)
+        self.fig.patch.set_facecolor('#faf0e6')
+        self.ax.set_theta_direction(-1)
+        self.ax.set_theta_offset(np.pi / 2)
+        self.draw_static()
+        self.draw_year()
+        metrics.count("artists", artist_count(self.fig))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # drop the artists and the Agg buffer now rather than whenever gc finds the cycles
+        self.fig.clear()
+        release_renderer(self.fig)
+        self.city_artists = []
+
+    def draw_static(self):
+        ax = self.ax
+        geo = self.geometry
+        theta = self.theta
+
+        hour_labels_to_display = ['1AM', '4AM', '7AM', '10AM', '1PM', '4PM', '7PM', '10PM']
+        hour_ticks_to_display = [x / 24 for x in range(1, 24, 3)]
+
+        ax.set_xticks(geo.month_tick_angles)
+        ax.set_xticklabels([])
+        label_height = 1.1
+        for angle, label in zip(geo.month_tick_angles, geometry.MONTH_LABELS):
+            ax.text(angle, label_height, label, horizontalalignment='center', fontsize=22, color="#2F4F4F", fontweight='bold')
+
+        ax.add_collection(LineCollection([[(angle, 0), (angle, 1.2)] for angle in geo.divider_angles],
+                                         colors='#02735E', linewidths=0.5, zorder=3), autolim=False)
+
+        rings = [band_polygon(theta, tick - 0.0005, tick + 0.0005) for tick in hour_ticks_to_display]
+        ax.add_collection(raster_layer(PolyCollection(rings, facecolors=to_rgba('gray', 0.4), linewidths=0, zorder=OVERLAY_ZORDER)),
+                          autolim=False)
+
+        marker_radius = 0.97
+        marker_size = 100
+        full_moon_angles = geo.angle(events.day_of_year(events.full_moons(self.year), self.year))
+        ax.scatter(full_moon_angles, np.full(len(full_moon_angles), marker_radius),
+                   s=marker_size, color='#A1A2A6', marker='o', zorder=4)
+
+        for day in geo.sundays:
+            ax.text(geo.day_angles[day], geo.label_radius[day], str(geo.month_day[day]), ha=geo.label_ha[day],
+                    va='center', fontsize=16, color='#696969', rotation=geo.label_rotation[day], zorder=5,
+                    fontweight='bold')
+
+        for i, label in enumerate(hour_labels_to_display):
+            angle_rad = 75 * np.pi / 180
+            radius = hour_ticks_to_display[i]
+            ax.text(angle_rad, radius, label, ha='left', va='center', fontsize=9, color='#e7fdeb', zorder=10)
+
+        streaks = []
+        streak_widths = []
+        streak_alphas = []
+        for shower in events.meteor_showers(self.year):
+            start_day, end_day, peak_day = events.day_of_year([shower.start, shower.end, shower.peak], self.year)
+            start_angle, end_angle, peak_angle = geo.angle([start_day, end_day, peak_day])
+
+            lines_per_day, skew = meteor_styles.get(shower.name, meteor_styles['Geminids'])
+            num_lines = int((end_day - start_day) * lines_per_day)
+            beta_samples = np.random.beta(2, 2*skew, num_lines)
+            random_angles = start_angle + beta_samples * (end_angle - start_angle)
+            peak_idx = np.abs(random_angles - peak_angle).argmin()
+            random_angles[peak_idx] = peak_angle
+            random_angles = np.append(random_angles, [start_angle, end_angle])
+            random_radii = np.random.uniform(0.91, 0.928, num_lines + 2)
+            radius_inc = np.random.uniform(0.001, 0.008, num_lines + 2)
+            for radius, angle, change in zip(random_radii, random_angles, radius_inc):
+                streaks.append([(angle, radius), (angle, radius + change)])
+            streak_widths += [0.4] * len(random_radii)
+            streak_alphas += list(0.65 + radius_inc * 20)
+
+            streaks += [[(peak_angle, 0.95), (peak_angle, 0.97)],
+                        [(peak_angle - 0.002, 0.9), (peak_angle - 0.002, 0.94)],
+                        [(peak_angle + 0.003, 0.92), (peak_angle + 0.003, 0.95)]]
+            streak_widths += [0.25, 0.3, 0.25]
+            streak_alphas += [1, 1, 0.9]
+
+        ax.add_collection(LineCollection(streaks, colors=[to_rgba('white', alpha) for alpha in streak_alphas],
+                                         linewidths=streak_widths, zorder=6), autolim=False)
+
+        ax.set_ylim(0, 1.05)
+        ax.set_yticklabels([])
+
+    def draw_year(self):
+        self.ax.text(0.5, 1.23, str(self.year), ha='center', va='center',
+                     fontproperties=font('Arvo-Regular.ttf', 48), transform=self.ax.transAxes)
+        self.fig.subplots_adjust(top=0.9)
+
+    def draw_eclipses(self, data, tz=None):
+        # total lunar eclipses of the year; with the city's timezone only the ones
+        # happening at night there, when the (opposite the sun) moon is up
+        eclipses = [eclipse for eclipse in events.eclipses(self.year)
+                    if eclipse.body == 'lunar' and eclipse.kind == 'total']
+        days = events.day_of_year([eclipse.instant for eclipse in eclipses], self.year)
+        if tz is not None and len(days):
+            days = days + ephemeris.utc_offsets(np.datetime64(f'{self.year}-01-01') + days.astype(int), tz) / 24
+            index = np.clip(days.astype(int), 0, self.num_days - 1)
+            hours = (days % 1) * 24
+            days = days[~((data.sunrise[index] <= hours) & (hours <= data.sunset[index]))]
+
+        marker_radius = 0.97
+        marker_size = 100
+        angles = self.geometry.angle(days)
+        artists = []
+        if self.eclipse_halo:
+            artists += [self.ax.add_patch(Circle((angle, marker_radius), radius=0.009, color='white', alpha=0.7, zorder=4))
+                        for angle in angles]
+        artists.append(self.ax.scatter(angles, np.full(len(angles), marker_radius), s=marker_size,
+                                       color=self.eclipse_color, marker='o', zorder=5))
+        return artists
+
+    def draw_data(self, data, tz=None):
+        # the sun, twilight, noon and eclipse layers of one city
+        ax = self.ax
+        theta = self.theta
+
+        layers = band_layers(data)
+        colors = [to_rgba(color, alpha) for _, _, color, alpha in layers]
+        bands = PolyCollection([band_polygon(theta, inner, outer) for inner, outer, _, _ in layers],
+                               facecolors=colors, edgecolors=colors, zorder=2)
+        ax.add_collection(raster_layer(bands), autolim=False)
+
+        # noon line
+        noon_r = np.append(data.noon, data.noon[0]) / 24
+        color = to_rgba('#FFFACD', 0.05)
+        noon = PolyCollection([band_polygon(theta, noon_r - 0.002, noon_r + 0.002)],
+                              facecolors=color, edgecolors=color, zorder=OVERLAY_ZORDER)
+        ax.add_collection(raster_layer(noon), autolim=False)
+
+        return [bands, noon, *self.draw_eclipses(data, tz)]
+
+    def render(self, data, city_name, coordinates_str, tz=None):
+        # draws one city's data layers over the static ones and returns the figure
+        if data.year is not None and data.year != self.year:
+            raise ValueError(f"data for {data.year} on a {self.year} template")
+        if len(data.sunrise) != self.num_days:
+            raise ValueError(f"{len(data.sunrise)} days of data for a {self.num_days} day template")
+        for artist in self.city_artists:
+            artist.remove()
+        ax = self.ax
+
+        data_artists = self.draw_data(data, tz)
+
+        title = ax.text(0.5, 1.18, city_name, ha='center', va='center',
+                        fontproperties=font('Arvo-Bold.ttf', 64, 'bold'), transform=ax.transAxes)
+        coordinates = ax.text(0.5, 1.14, coordinates_str, ha='center', va='center',
+                              fontproperties=font('Arvo-Regular.ttf', 20), transform=ax.transAxes)
+
+        self.city_artists = [*data_artists, title, coordinates]
+        metrics.count("artists", len(self.city_artists))
+        return self.fig
+
+
+@dataclasses.dataclass(frozen=True)
+class View:
+    name: str  # output file suffix, the full view has none
+    start: float  # hours at the centre
+    end: float  # hours at the rim
+
+
+FULL_VIEW = View("full", 0, 24)
+VIEWS = {
+    "full": FULL_VIEW,
+    "dawn": View("dawn", 4, 7.25),
+    "dusk": View("dusk", 17, 20.25),
+}
+
+
+def parse_view(text):
+    # "full", "dawn", "dusk", or a custom window "START-END" in hours such as "5-8.5"
+    if text in VIEWS:
+        return VIEWS[text]
+    start, _, end = text.partition("-")
+    start, end = float(start), float(end)
+    if not 0 <= start < end <= 24:
+        raise ValueError(f"view window must be START-END hours within 0-24, not {text}")
+    return View(f"{start:g}-{end:g}h", start, end)
+
+
+def format_hour(hours):
+    hour, minute = divmod(round(hours * 60) % (24 * 60), 60)
+    return f"{hour % 12 or 12}:{minute:02d}{'AM' if hour < 12 else 'PM'}"
+
+
+class WindowTemplate(CalendarTemplate):
+    # A radial zoom on the view.start .. view.end hours of every day: the bands
+    # clipped to the window, finer hour rings, month and Sunday labels at its
+    # rim. The moon and meteor markers only exist on the full view.
+
+    def __init__(self, year=2025, view=VIEWS['dawn']):
+        self.view = view
+        super().__init__(year)
+
+    def scaled(self, offset):
+        # radial offsets were tuned on the 3.25 h dawn window
+        return offset * (self.view.end - self.view.start) / 3.25
+
+    def draw_static(self):
+        ax = self.ax
+        geo = self.geometry
+        start, end = self.view.start / 24, self.view.end / 24
+        ax.set_ylim(start, end)
+
+        ax.set_xticks(geo.month_tick_angles)
+        ax.set_xticklabels([])
+        ax.set_yticklabels([])
+        for angle, label in zip(geo.month_tick_angles, geometry.MONTH_LABELS):
+            ax.text(angle, end + self.scaled(0.006), label, horizontalalignment='center', fontsize=22,
+                    color="#2F4F4F", fontweight='bold')
+
+        ax.add_collection(LineCollection([[(angle, start), (angle, end)] for angle in geo.divider_angles],
+                                         colors='#02735E', linewidths=0.5, zorder=10), autolim=False)
+
+        for day in geo.sundays:
+            ax.text(geo.day_angles[day], end - self.scaled(0.008), str(geo.month_day[day]), ha='center',
+                    va='center', fontsize=14, color='#696969', rotation=geo.label_rotation[day], zorder=5,
+                    fontweight='bold')
+
+        # rings every 15 min on a dawn-sized window, coarser on wider ones; the
+        # outer half hour stays unlabelled, clear of the Sunday dates
+        span = self.view.end - self.view.start
+        step = next(step for step in (0.25, 0.5, 1, 3) if span / step <= 16)
+        hours = np.arange(np.ceil(self.view.start / step) * step, self.view.end - 0.25 + 1e-9, step)
+        width = self.scaled(0.0001)
+        rings = [band_polygon(self.theta, hour / 24 - width, hour / 24 + width) for hour in hours]
+        ax.add_collection(raster_layer(PolyCollection(rings, facecolors=to_rgba('gray', 0.4), linewidths=0, zorder=OVERLAY_ZORDER)),
+                          autolim=False)
+        for hour in hours[hours <= self.view.end - 0.5]:
+            ax.text(np.pi / 2, hour / 24, format_hour(hour), ha='left', va='center', fontsize=9, color='#e7fdeb',
+                    zorder=10)
+
+    def draw_data(self, data, tz=None):
+        # the bands clipped to the window, leaving a thin rim for the Sunday dates;
+        # layers entirely outside it are dropped so their edges don't draw at the rim
+        low, high = self.view.start / 24, self.view.end / 24 - self.scaled(0.005)
+        noon_r = np.append(data.noon, data.noon[0]) / 24
+        layers = band_layers(data) + [(noon_r - 0.002, noon_r + 0.002, '#FFFACD', 0.05)]
+        polygons = []
+        colors = []
+        for inner, outer, color, alpha in layers:
+            inner = np.clip(inner, low, high)
+            outer = np.clip(outer, low, high)
+            if np.all(inner >= outer):
+                continue
+            polygons.append(band_polygon(self.theta, inner, outer))
+            colors.append(to_rgba(color, alpha))
+        bands = PolyCollection(polygons, facecolors=colors, edgecolors=colors, zorder=2)
+        self.ax.add_collection(raster_layer(bands), autolim=False)
+        return [bands]
+
+
+@functools.lru_cache(maxsize=4)
+def calendar_template(year=2025, eclipse_color='black', eclipse_halo=True, view=FULL_VIEW):
+    # one template per year, style and view, kept for the life of the process
+    if view == FULL_VIEW:
+        return CalendarTemplate(year, eclipse_color, eclipse_halo)
+    return WindowTemplate(year, view)
+
+
+def warm_up(year=2025):
+    # load the fonts and draw the year's static layers, for long-lived processes
+    for name in FONT_FILES:
+        font_manager.get_font(name)
+    fig = calendar_template(year).fig
+    fig.canvas.draw()
+    release_renderer(fig)
+
+
+def format_coordinates(lat, lon):
+    return f"{abs(lat)}°{'N' if lat >= 0 else 'S'}, {abs(lon)}°{'E' if lon >= 0 else 'W'}"
+
+
+def release_renderer(fig):
+    # the canvas caches its last Agg renderer, a full-resolution RGBA buffer
+    # (~200 MB at 24in/300dpi), and so does every text artist it drew; a cached
+    # template would hold one for the life of the process. A fresh canvas and
+    # clearing the texts' reference (as Text.__getstate__ does) lets it go.
+    FigureCanvasAgg(fig)
+    for text in fig.findobj(Text):
+        text._renderer = None
+
+
+def tight_bbox(fig, pad_inches=1, dpi=None):
+    # tight bbox in inches from one layout pass without rasterizing, laid out at
+    # dpi (default the figure's own); the layout canvas is allocated at that dpi
+    canvas = fig.canvas if isinstance(fig.canvas, FigureCanvasAgg) else FigureCanvasAgg(fig)
+    figure_dpi = fig.dpi
+    if dpi:
+        fig.set_dpi(dpi)
+    try:
+        fig.draw_without_rendering()
+        return fig.get_tightbbox(canvas.get_renderer()).padded(pad_inches)
+    finally:
+        fig.set_dpi(figure_dpi)
+
+
+def tight_pixels(fig, bbox, dpi=None):
+    # Agg pixels of the bbox region, drawn the way savefig(bbox_inches=bbox) does.
+    # The title and year sit above the figure edge, so they have to be drawn
+    # into the enlarged canvas rather than cut from the figure's own buffer.
+    dpi = dpi or fig.dpi
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='rgba', bbox_inches=bbox, dpi=dpi)
+    size = (int(bbox.width * dpi), int(bbox.height * dpi))
+    image = Image.frombuffer('RGBA', size, buffer.getbuffer(), 'raw', 'RGBA', 0, 1)
+    if to_rgba(fig.get_facecolor())[3] == 1:
+        # opaque background, an RGB PNG is identical and encodes faster
+        image = image.convert('RGB')
+    return image
+
+
+# dpi the bbox is laid out at for previews, tiled PNGs and PNGs below the
+# figure's dpi, so none of them allocates a canvas at the full resolution
+LAYOUT_DPI = 72
+# rows per strip of a tiled PNG: 1024 rows of a 300 dpi calendar are ~30 MB of RGBA
+STRIP_HEIGHT = 1024
+
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def write_png_strips(f, width, height, dpi, strips):
+    # streams a PNG from (rows, width, channels) uint8 strips, top to bottom, so
+    # only one strip is in memory at a time; every row uses the Sub filter,
+    # which suits the flat bands
+    channels = None
+    compressor = zlib.compressobj(6)
+    for strip in strips:
+        if channels is None:
+            channels = strip.shape[2]
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, {3: 2, 4: 6}[channels], 0, 0, 0)))
+            pixels_per_meter = round(dpi / 0.0254)
+            f.write(png_chunk(b'pHYs', struct.pack('>IIB', pixels_per_meter, pixels_per_meter, 1)))
+        rows = strip.reshape(len(strip), -1)
+        filtered = np.empty((len(rows), rows.shape[1] + 1), np.uint8)
+        filtered[:, 0] = 1
+        filtered[:, 1:channels + 1] = rows[:, :channels]
+        np.subtract(rows[:, channels:], rows[:, :-channels], out=filtered[:, channels + 1:])
+        data = compressor.compress(filtered)
+        if data:
+            f.write(png_chunk(b'IDAT', data))
+    f.write(png_chunk(b'IDAT', compressor.flush()))
+    f.write(png_chunk(b'IEND', b''))
+
+
+def pixel_strips(fig, bounds, dpi, strip_height):
+    # bounds are whole pixels at dpi (left, bottom, right, top), so every strip
+    # is drawn at an integer offset and they join without seams
+    left, bottom, right, top = bounds
+    opaque = to_rgba(fig.get_facecolor())[3] == 1
+    for strip_top in range(top, bottom, -strip_height):
+        strip_bottom = max(strip_top - strip_height, bottom)
+        # half a pixel of slack, the canvas size is truncated from inches * dpi
+        strip = Bbox([[left / dpi, strip_bottom / dpi], [(right + 0.5) / dpi, (strip_top + 0.5) / dpi]])
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='rgba', bbox_inches=strip, dpi=dpi)
+        pixels = np.frombuffer(buffer.getbuffer(), np.uint8).reshape(strip_top - strip_bottom, right - left, 4)
+        yield pixels[..., :3] if opaque else pixels
+
+
+def tiled_png(fig, target, bbox, dpi, strip_height=STRIP_HEIGHT):
+    # PNG of the bbox at dpi drawn strip_height rows at a time: peak memory is
+    # one strip, whatever the print size
+    left, bottom = np.floor(bbox.p0 * dpi).astype(int)
+    right, top = np.ceil(bbox.p1 * dpi).astype(int)
+    strips = pixel_strips(fig, (left, bottom, right, top), dpi, strip_height)
+    if hasattr(target, 'write'):
+        write_png_strips(target, right - left, top - bottom, dpi, strips)
+    else:
+        with open(target, 'wb') as f:
+            write_png_strips(f, right - left, top - bottom, dpi, strips)
+
+
+def save_figure(fig, base_path, formats=('png', 'pdf'), pad_inches=1, **options):
+    return export_figure(fig, {fmt: f'{base_path}.{fmt}' for fmt in formats}, pad_inches, **options)
+
+
+def hybrid_pdf(fig, bbox, dpi):
+    # PDF bytes with the raster layers and everything under them (background,
+    # grid) flattened into one opaque image at dpi; text, dividers, markers and
+    # meteor streaks stay vectors on top. Letting savefig rasterize the layers
+    # instead gives an RGBA image with an alpha mask per run of them.
+    top = max(artist.zorder for artist in fig.findobj() if getattr(artist, 'raster_layer', False))
+    children = [artist for ax in fig.axes for artist in ax.get_children() if artist.get_visible()]
+    background = [fig.patch] + [artist for artist in children if artist.zorder <= top]
+    foreground = [artist for artist in children if artist.zorder > top]
+
+    for artist in foreground:
+        artist.set_visible(False)
+    try:
+        pixels = np.asarray(tight_pixels(fig, bbox, dpi))
+    finally:
+        for artist in foreground:
+            artist.set_visible(True)
+        release_renderer(fig)
+
+    width, height = fig.get_size_inches()
+    image_ax = fig.add_axes((bbox.x0 / width, bbox.y0 / height, bbox.width / width, bbox.height / height),
+                            zorder=-1)
+    image_ax.set_axis_off()
+    image_ax.imshow(pixels, extent=(0, 1, 0, 1), aspect='auto', interpolation='none')
+    for artist in background:
+        artist.set_visible(False)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='pdf', bbox_inches=bbox)
+        return buffer.getvalue()
+    finally:
+        for artist in background:
+            artist.set_visible(True)
+        image_ax.remove()
+
+
+def write_bytes(target, data):
+    if hasattr(target, 'write'):
+        target.write(data)
+    else:
+        with open(target, 'wb') as f:
+            f.write(data)
+
+
+def export_figure(fig, outputs, pad_inches=1, raster_dpi=None, png_dpi=None, png_size=None, strip_height=None):
+    # outputs maps format -> path or binary file object.
+    # The tight bbox comes from one layout pass without rasterizing; every format
+    # gets it precomputed so savefig skips its own tight-bbox draw.
+    # raster_dpi makes the PDF hybrid, raster layers as an image at raster_dpi.
+    # The PNG is drawn at png_dpi (default the figure's), or at whatever dpi makes
+    # its long edge png_size pixels; fonts and lines are sized in points, so a
+    # preview keeps the print layout. strip_height draws it in strips of that
+    # many rows to bound memory for large prints.
+    low_memory = png_size or strip_height or (png_dpi and png_dpi < fig.dpi)
+    try:
+        with metrics.stage("layout"):
+            bbox = tight_bbox(fig, pad_inches, LAYOUT_DPI if low_memory else None)
+
+        for fmt, target in outputs.items():
+            if fmt == 'png':
+                dpi = png_size / max(bbox.width, bbox.height) if png_size else png_dpi or fig.dpi
+                if strip_height:
+                    # strips are drawn and encoded in turn, all of it counts as the draw
+                    with metrics.stage("draw"):
+                        tiled_png(fig, target, bbox, dpi, strip_height)
+                else:
+                    with metrics.stage("draw"):
+                        image = tight_pixels(fig, bbox, dpi)
+                    with metrics.stage("encode.png"):
+                        image.save(target, format='png', dpi=(dpi, dpi))
+                continue
+            # vector backends draw and encode in one pass
+            with metrics.stage(f"encode.{fmt}"):
+                if fmt == 'pdf' and raster_dpi:
+                    write_bytes(target, hybrid_pdf(fig, bbox, raster_dpi))
+                else:
+                    fig.savefig(target, format=fmt, bbox_inches=bbox)
+    finally:
+        # every backend draw leaves its renderer on the canvas
+        release_renderer(fig)
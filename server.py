@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import collections
+import io
+import json
+import math
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+from zoneinfo import ZoneInfo
+
+import calendar_data
+import render
+
+# Small localhost service that renders calendars on demand:
+#
+#   GET /calendar?lat=17.7219&lon=83.3057&tz=Asia/Kolkata&year=2025&format=png&name=Vizag
+#   GET /stats
+#
+# Rendering runs in worker processes that import matplotlib, load the fonts and
+# draw the year's static template before taking requests, so a request only pays
+# for the city layers and the export. Finished files are kept in a byte-bounded
+# LRU keyed by the request parameters, and identical requests arriving while one
+# is still rendering wait on that render instead of starting another.
+
+CONTENT_TYPES = {"png": "image/png", "pdf": "application/pdf", "svg": "image/svg+xml"}
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+DEFAULT_YEAR = 2025
+HEADER_TIMEOUT = 10
+
+warm_year = None
+
+
+def start_worker(year):
+    # only the warmed year's template stays cached in a worker; any other year
+    # gets a one-off template, so a worker holds one template whatever is asked
+    global warm_year
+    warm_year = year
+    render.warm_up(year)
+
+
+def render_to_bytes(lat, lon, tz, year, fmt, name):
+    data = calendar_data.compute_calendar_data(lat, lon, tz, year)
+    coordinates = render.format_coordinates(lat, lon)
+    out = io.BytesIO()
+    if year == warm_year:
+        render.export_figure(render.calendar_template(year).render(data, name, coordinates, tz), {fmt: out})
+    else:
+        with render.CalendarTemplate(year) as template:
+            render.export_figure(template.render(data, name, coordinates, tz), {fmt: out})
+    return out.getvalue()
+
+
+def parse_params(query):
+    # raises ValueError/KeyError on bad input, which the handler turns into a 400
+    params = dict(parse_qsl(query, strict_parsing=True))
+    lat = float(params["lat"])
+    lon = float(params["lon"])
+    if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("lat must be within -90..90 and lon within -180..180")
+    tz = params.get("tz", "UTC")
+    ZoneInfo(tz)
+    year = int(params.get("year", DEFAULT_YEAR))
+    if not 1900 <= year <= 2100:
+        raise ValueError("year must be within 1900..2100")
+    fmt = params.get("format", "png")
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"format must be one of {', '.join(CONTENT_TYPES)}")
+    name = params.get("name", "")[:64]
+    # ~10 m of rounding so nearby requests share a cache entry
+    return round(lat, 4), round(lon, 4), tz, year, fmt, name
+
+
+class ResponseCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        body = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        self.entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def stats(self):
+        return {"cache_hits": self.hits, "cache_misses": self.misses,
+                "cache_entries": len(self.entries), "cache_bytes": self.size}
+
+
+class CalendarServer:
+    def __init__(self, executor, cache):
+        self.executor = executor
+        self.cache = cache
+        self.inflight = {}
+        self.renders = 0
+        self.coalesced = 0
+
+    async def calendar(self, key):
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        future = self.inflight.get(key)
+        if future is None:
+            self.renders += 1
+            future = asyncio.get_running_loop().run_in_executor(self.executor, render_to_bytes, *key)
+            future.add_done_callback(lambda done: self.finish(key, done))
+            self.inflight[key] = future
+        else:
+            self.coalesced += 1
+        # shielded: a client hanging up must not cancel the render other clients wait on
+        return await asyncio.shield(future)
+
+    def finish(self, key, future):
+        del self.inflight[key]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    def stats(self):
+        return {**self.cache.stats(), "renders": self.renders, "coalesced": self.coalesced,
+                "inflight": len(self.inflight)}
+
+    async def respond(self, method, target):
+        if method != "GET":
+            return 405, "text/plain", b"only GET is supported\n"
+        url = urlsplit(target)
+        if url.path == "/stats":
+            return 200, "application/json", json.dumps(self.stats()).encode()
+        if url.path != "/calendar":
+            return 404, "text/plain", b"try /calendar?lat=..&lon=..&tz=..&year=..&format=png\n"
+        try:
+            key = parse_params(url.query)
+        except (ValueError, KeyError) as e:
+            return 400, "text/plain", f"bad request: {e}\n".encode()
+        try:
+            body = await self.calendar(key)
+        except Exception:
+            traceback.print_exc()
+            return 500, "text/plain", b"render failed\n"
+        return 200, CONTENT_TYPES[key[4]], body
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+            # headers are not used, just consumed up to the blank line
+            while await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3:
+                status, content_type, body = 400, "text/plain", b"malformed request line\n"
+            else:
+                status, content_type, body = await self.respond(parts[0], parts[1])
+            writer.write((f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                          f"Content-Type: {content_type}\r\n"
+                          f"Content-Length: {len(body)}\r\n"
+                          "Connection: close\r\n\r\n").encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, jobs, cache_bytes, year):
+    with ProcessPoolExecutor(max_workers=jobs, initializer=start_worker, initargs=(year,)) as executor:
+        # start every worker now so the first requests don't pay the warm-up
+        await asyncio.gather(*(asyncio.get_running_loop().run_in_executor(executor, int) for _ in range(jobs)))
+        server = CalendarServer(executor, ResponseCache(cache_bytes))
+        listener = await asyncio.start_server(server.handle, host, port)
+        print(f"serving calendars on http://{host}:{port}/calendar with {jobs} workers", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve polar calendars over HTTP on localhost")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="number of render worker processes, 0 uses every core (default: 0)")
+    parser.add_argument("--cache-size", type=float, default=512,
+                        help="rendered file cache size cap in MB (default: 512)")
+    parser.add_argument("--year", type=int, default=DEFAULT_YEAR,
+                        help="year whose template workers prepare at startup (default: %(default)s)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.jobs or os.cpu_count(),
+                          int(args.cache_size * 2**20), args.year))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import functools
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from generate_plot_batch import bounded_map  # noqa: E402
+
+# A worker killed outright breaks the whole pool, failing every place still in
+# it. Only the place that killed it may be reported crashed; the others must
+# come back with their own results, in order.
+
+
+def work(killers, item):
+    if item in killers:
+        os.kill(os.getpid(), signal.SIGKILL)
+    # long enough that the neighbours are still running when a worker dies
+    time.sleep(0.2)
+    return item
+
+
+def crashed(item, error):
+    return ("crashed", item)
+
+
+@pytest.mark.parametrize("killers", [{5}, {5, 6}, {0, 11}])
+def test_only_the_killers_are_reported_crashed(killers):
+    results = list(bounded_map(ProcessPoolExecutor, functools.partial(work, killers), range(12), 3, 6, crashed))
+    assert results == [("crashed", item) if item in killers else item for item in range(12)]
@@ -0,0 +1,48 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import matplotlib
+
+# Peak memory of a long batch must not grow with the number of cities. Every
+# export has to release its full-resolution Agg renderer (~200 MB at 24in/300dpi),
+# or each cached template keeps one for the life of the worker. The cities are
+# rendered in a fresh interpreter, cycling through years and views the way the
+# batch and the server do, and it reports its peak RSS after every city.
+# render.py loads the Arvo fonts from the working directory; matplotlib's own
+# DejaVu fonts stand in for them.
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONTS = {"Arvo-Regular.ttf": "DejaVuSans.ttf", "Arvo-Bold.ttf": "DejaVuSans-Bold.ttf"}
+CITIES = 6
+# well under one leaked renderer
+ALLOWED_GROWTH_MB = 100
+
+SCRIPT = """
+import io, json, resource, sys
+import calendar_data, render
+from generate_plot_batch import default_places
+
+# ru_maxrss is in KB on Linux, bytes on macOS
+unit = 2**20 if sys.platform == "darwin" else 2**10
+for i, place in enumerate(default_places()[:int(sys.argv[1])]):
+    year = 2025 + i % 4
+    data = calendar_data.compute_calendar_data(place.lat, place.lon, place.tz, year)
+    for view in (render.FULL_VIEW, render.VIEWS["dawn"]):
+        fig = render.calendar_template(year, view=view).render(data, place.name, "", place.tz)
+        render.export_figure(fig, {"png": io.BytesIO()})
+    print(json.dumps(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit), flush=True)
+"""
+
+
+def test_peak_rss_stays_flat_across_cities(tmp_path):
+    for name, stand_in in FONTS.items():
+        shutil.copy(os.path.join(matplotlib.get_data_path(), "fonts", "ttf", stand_in), tmp_path / name)
+    env = {**os.environ, "PYTHONPATH": REPO, "MPLBACKEND": "Agg"}
+    result = subprocess.run([sys.executable, "-c", SCRIPT, str(CITIES)], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, check=True)
+    peaks = [json.loads(line) for line in result.stdout.splitlines()]
+    assert len(peaks) == CITIES
+    assert peaks[-1] - peaks[0] < ALLOWED_GROWTH_MB, f"peak RSS per city in MB: {peaks}"